@@ -5,6 +5,20 @@ __version__ = "2.1.0"
 __author__ = "Clipper Team"
 __description__ = "Video Player + Enhanced AI-Based Highlight Detection"
 
-# Make key classes available at the package level for easier imports
-from .gui import VideoTranscriberEditor
-from .transcription import TranscriptionWorker
\ No newline at end of file
+# Make key classes available at the package level for easier imports.
+# They are imported on first access (PEP 562) so importing the package stays cheap.
+_LAZY_EXPORTS = {
+    "VideoTranscriberEditor": ".gui",
+    "TranscriptionWorker": ".transcription",
+}
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = list(_LAZY_EXPORTS)
@@ -1,10 +1,141 @@
 # Clip editing functionality
 
 import os
-from PyQt5.QtWidgets import QMessageBox, QFileDialog, QApplication
-from PyQt5.QtCore import QTimer, QDir
+import subprocess
+from functools import lru_cache
+from PyQt5.QtWidgets import QMessageBox, QFileDialog
+from PyQt5.QtCore import QDir, QThread, pyqtSignal
+from PyQt5.QtMultimedia import QMediaPlayer
+from config import (
+    FFMPEG_BINARY, FFPROBE_BINARY, CLIP_KEYFRAME_TOLERANCE,
+    HWACCEL_ENCODER, H264_ENCODERS, HWACCEL_BITRATE, X264_PRESET,
+    DEFAULT_ENCODE_THREADS
+)
 from utils import format_time, parse_time_string
 
+def _ffmpeg_stream_copy(src, dst, start, end):
+    """Cut a clip with ffmpeg stream copy (no re-encode). Returns True on success"""
+    if not FFMPEG_BINARY:
+        return False
+    cmd = [
+        FFMPEG_BINARY, '-y',
+        '-ss', str(start), '-i', src,
+        '-t', str(end - start),
+        '-c', 'copy', '-map', '0',
+        '-movflags', '+faststart',
+        dst
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError as e:
+        print(f"Stream copy error: {e}")
+        return False
+    if result.returncode != 0:
+        print(f"Stream copy failed: {result.stderr.decode(errors='ignore')[-500:]}")
+        return False
+    return True
+
+def _keyframe_before(src, t):
+    """Return the time of the last video keyframe at or before t, or None if it can't be determined"""
+    if not FFPROBE_BINARY:
+        return None
+    cmd = [
+        FFPROBE_BINARY, '-v', 'error',
+        '-select_streams', 'v:0', '-skip_frame', 'nokey',
+        '-show_entries', 'frame=best_effort_timestamp_time', '-of', 'csv=p=0',
+        # Only probe a short interval before the cut point instead of the whole file
+        '-read_intervals', f"{max(0, t - 20)}%{t + 0.1}",
+        src
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        values = (v.strip(',') for v in result.stdout.decode().split())
+        times = [float(v) for v in values if v and v != 'N/A']
+    except (OSError, ValueError):
+        return None
+    earlier = [kf for kf in times if kf <= t + 0.001]
+    return max(earlier) if earlier else None
+
+@lru_cache(maxsize=1)
+def _pick_h264_encoder():
+    """Pick the preferred H.264 encoder that this ffmpeg build supports (probed once)"""
+    if HWACCEL_ENCODER != "auto":
+        return HWACCEL_ENCODER
+    if not FFMPEG_BINARY:
+        return 'libx264'
+    try:
+        result = subprocess.run([FFMPEG_BINARY, '-hide_banner', '-encoders'],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return 'libx264'
+    # Lines look like " V....D h264_nvenc    NVIDIA NVENC H.264 encoder"
+    available = {line.split()[1] for line in result.stdout.decode(errors='ignore').splitlines()
+                 if len(line.split()) > 1}
+    for encoder in H264_ENCODERS:
+        if encoder in available:
+            return encoder
+    return 'libx264'
+
+def _can_stream_copy(src, start_time):
+    """Check if a stream-copy cut would start close enough to the requested time"""
+    keyframe = _keyframe_before(src, start_time)
+    if keyframe is None:
+        # Can't probe keyframes, ffmpeg will start at the nearest one before the cut
+        return True
+    return start_time - keyframe <= CLIP_KEYFRAME_TOLERANCE
+
+def _reencode_clip(subclip, output_path, encoder):
+    """Re-encode a subclip, preferring a hardware H.264 encoder. Returns the encoder that worked"""
+    if encoder != 'libx264':
+        try:
+            subclip.write_videofile(output_path, codec=encoder, audio_codec='aac', preset='medium', threads=DEFAULT_ENCODE_THREADS,
+                                    ffmpeg_params=['-b:v', HWACCEL_BITRATE, '-movflags', '+faststart'],
+                                    write_logfile=False, logger=None)
+            return encoder
+        except Exception as e:
+            # Encoder is compiled in but the hardware/driver isn't usable
+            print(f"Hardware encoder {encoder} failed, falling back to libx264: {e}")
+    
+    # No tqdm progress bar: status is reported through the worker's progress signal instead
+    subclip.write_videofile(output_path, codec='libx264', audio_codec='aac', preset=X264_PRESET, threads=DEFAULT_ENCODE_THREADS,
+                            ffmpeg_params=['-movflags', '+faststart'],
+                            write_logfile=False, logger=None)
+    return 'libx264'
+
+class ClipSaveWorker(QThread):
+    """Worker thread that cuts or re-encodes a clip without blocking the UI"""
+    progress = pyqtSignal(str)
+    saved = pyqtSignal(str)  # Not "finished", which would shadow QThread.finished
+    save_failed = pyqtSignal(str)
+
+    def __init__(self, video_path, start_time, end_time, output_path, codec):
+        super().__init__()
+        self.video_path = video_path
+        self.start_time = start_time
+        self.end_time = end_time
+        self.output_path = output_path
+        self.codec = codec
+
+    def run(self):
+        try:
+            # Stream copy is near-instant; only re-encode when the cut must be frame-accurate
+            if (_can_stream_copy(self.video_path, self.start_time) and
+                    _ffmpeg_stream_copy(self.video_path, self.output_path, self.start_time, self.end_time)):
+                self.saved.emit(self.output_path)
+                return
+            
+            self.progress.emit("Re-encoding clip for an accurate cut... Please wait")
+            from moviepy.editor import VideoFileClip  # Only needed when stream copy is not possible
+            video_clip = VideoFileClip(self.video_path)
+            try:
+                subclip = video_clip.subclip(self.start_time, self.end_time)
+                self.codec = _reencode_clip(subclip, self.output_path, self.codec)
+            finally:
+                video_clip.close()
+            self.saved.emit(self.output_path)
+        except Exception as e:
+            self.save_failed.emit(str(e))
+
 class ClipEditor:
     def __init__(self, parent):
         """Initialize clip editor functionality
@@ -15,6 +146,10 @@ class ClipEditor:
         self.parent = parent
         self.clip_start_time = None
         self.clip_end_time = None
+        self.encoder = None  # Chosen lazily, libx264 if the hardware encoder fails
+        self.save_worker = None
+        self.preview_end_ms = None  # Playback pauses when it reaches this position
+        self.preview_start_ms = None  # Where the preview seeks to; None once the seek has been seen
         
         # Connect signals
         self.connect_signals()
@@ -26,6 +161,8 @@ class ClipEditor:
         self.parent.preview_button.clicked.connect(self.preview_clip)
         self.parent.save_button.clicked.connect(self.save_clip)
         self.parent.apply_manual_button.clicked.connect(self.set_manual_times)
+        self.parent.media_player.positionChanged.connect(self.check_preview_end)
+        self.parent.media_player.stateChanged.connect(self.handle_preview_state)
     
     def mark_start(self):
         """Mark the current position as the start of a clip"""
@@ -50,7 +187,7 @@ class ClipEditor:
             start_time = parse_time_string(self.parent.start_entry.text())
             end_time = parse_time_string(self.parent.end_entry.text())
             # Check if times are valid
-            if start_time >= 0 and end_time > start_time and end_time <= self.parent.video_clip.duration:
+            if start_time >= 0 and end_time > start_time and end_time <= self.parent.media_player_controller.media_duration():
                 self.clip_start_time = start_time
                 self.clip_end_time = end_time
                 self.parent.clip_start_time = start_time
@@ -65,20 +202,41 @@ class ClipEditor:
     def preview_clip(self):
         """Preview the selected clip"""
         if self.validate_clip_times():
-            # Just seek to the start time and play
-            self.parent.media_player.setPosition(int(self.parent.clip_start_time * 1000))
-            self.parent.media_player.play()
-            
-            # Set a timer to stop at the end time
-            end_time_ms = int(self.parent.clip_end_time * 1000)
-            start_time_ms = int(self.parent.clip_start_time * 1000)
-            duration_ms = end_time_ms - start_time_ms
-            
-            # Create a one-shot timer to stop playback
-            QTimer.singleShot(duration_ms, self.parent.media_player.pause)
+            self.start_preview(self.parent.clip_start_time, self.parent.clip_end_time)
+    
+    def start_preview(self, start_time, end_time):
+        """Play from start_time and pause when playback reaches end_time"""
+        # Tied to the media clock, so seeking or buffering can't make it stop early or late
+        self.preview_start_ms = int(start_time * 1000)
+        self.preview_end_ms = int(end_time * 1000)
+        self.parent.media_player.setPosition(self.preview_start_ms)
+        self.parent.media_player.play()
+    
+    def check_preview_end(self, position):
+        """Pause playback once a preview reaches its end position"""
+        if self.preview_end_ms is None:
+            return
+        # setPosition is asynchronous, so positions from before the seek can still arrive (past
+        # the end when previewing an earlier clip); honour the end only once playback is inside the clip
+        if self.preview_start_ms is not None:
+            if not self.preview_start_ms <= position < self.preview_end_ms:
+                return
+            self.preview_start_ms = None
+        if position >= self.preview_end_ms:
+            self.preview_end_ms = None
+            self.parent.media_player.pause()
+    
+    def handle_preview_state(self, state):
+        """Cancel a pending preview stop if playback is paused or stopped some other way"""
+        if state != QMediaPlayer.PlayingState:
+            self.preview_end_ms = None
+            self.preview_start_ms = None
     
     def save_clip(self):
         """Save the selected clip as a new video file"""
+        if self.is_saving():
+            self.parent.status_label.setText("Already saving a clip... Please wait")
+            return
         if self.validate_clip_times():
             try:
                 if self.parent.is_audio_only:
@@ -97,15 +255,43 @@ class ClipEditor:
                 )
                 
                 if output_path:
+                    if self.encoder is None:
+                        self.encoder = _pick_h264_encoder()
+                    
                     self.parent.status_label.setText("Saving clip... Please wait")
-                    QMessageBox.processEvents()
-
-                    subclip = self.parent.video_clip.subclip(self.parent.clip_start_time, self.parent.clip_end_time)
-                    subclip.write_videofile(output_path, codec='libx264', audio_codec='aac', preset='medium', threads=4)
-                    self.parent.status_label.setText(f"Clip saved: {os.path.basename(output_path)}")
+                    self.save_worker = ClipSaveWorker(
+                        self.parent.video_file_path,
+                        self.parent.clip_start_time,
+                        self.parent.clip_end_time,
+                        output_path,
+                        self.encoder
+                    )
+                    self.save_worker.progress.connect(self.parent.status_label.setText)
+                    self.save_worker.saved.connect(self.handle_save_finished)
+                    self.save_worker.save_failed.connect(self.handle_save_failed)
+                    # saved/save_failed are emitted from inside run(), while isRunning() is still
+                    # true; the thread's own finished signal comes once is_saving() is false
+                    self.save_worker.finished.connect(self.update_clip_controls)
+                    self.save_worker.start()
+                    self.update_clip_controls()
             except Exception as e:
                 QMessageBox.critical(self.parent, "Save Error", f"Failed to save clip: {str(e)}")
     
+    def is_saving(self):
+        """Check if a clip is currently being saved"""
+        return self.save_worker is not None and self.save_worker.isRunning()
+    
+    def handle_save_finished(self, output_path):
+        """Handle a clip finishing saving in the background"""
+        # Remember if the hardware encoder had to be swapped for libx264
+        self.encoder = self.save_worker.codec
+        self.parent.status_label.setText(f"Clip saved: {os.path.basename(output_path)}")
+    
+    def handle_save_failed(self, error_message):
+        """Handle a clip failing to save in the background"""
+        self.parent.status_label.setText("Clip save failed")
+        QMessageBox.critical(self.parent, "Save Error", f"Failed to save clip: {error_message}")
+    
     def validate_clip_times(self):
         """Check if clip times are valid"""
         if self.parent.clip_start_time is None or self.parent.clip_end_time is None:
@@ -114,7 +300,7 @@ class ClipEditor:
         if self.parent.clip_end_time <= self.parent.clip_start_time:
             QMessageBox.warning(self.parent, "Invalid Time Range", "End time must be after start time.")
             return False
-        if not self.parent.is_audio_only and (self.parent.clip_start_time < 0 or self.parent.clip_end_time > self.parent.video_clip.duration):
+        if not self.parent.is_audio_only and (self.parent.clip_start_time < 0 or self.parent.clip_end_time > self.parent.media_player_controller.media_duration()):
             QMessageBox.warning(self.parent, "Out of Range", "Clip times must be within video duration.")
             return False
         return True
@@ -124,5 +310,5 @@ class ClipEditor:
         can_save = (self.parent.clip_start_time is not None and 
                     self.parent.clip_end_time is not None and 
                     self.parent.clip_end_time > self.parent.clip_start_time)
-        self.parent.save_button.setEnabled(can_save)
+        self.parent.save_button.setEnabled(can_save and not self.is_saving())
         self.parent.preview_button.setEnabled(can_save)
\ No newline at end of file
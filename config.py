@@ -1,5 +1,9 @@
 # Configuration settings and constants for the Clipper application
 
+import os
+import shutil
+import importlib.util
+
 # Check for optional dependencies
 try:
     import psutil
@@ -8,14 +12,43 @@ except ImportError:
     PSUTIL_AVAILABLE = False
 
 try:
-    from pydub import AudioSegment
-    from pydub.silence import detect_silence
-    PYDUB_AVAILABLE = True
+    import av
+    PYAV_AVAILABLE = True
 except ImportError:
-    PYDUB_AVAILABLE = False
+    PYAV_AVAILABLE = False
+
+# faster-whisper (CTranslate2) ships int8 CPU kernels. Only check that it is installed here;
+# importing it pulls in ctranslate2 and is deferred until the model loads
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+
+# Numba compiles the highlight window scan to machine code; without it the scan runs as plain Python
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Locate ffmpeg/ffprobe for direct clip cutting (moviepy ships ffmpeg via imageio-ffmpeg)
+try:
+    import imageio_ffmpeg
+    FFMPEG_BINARY = imageio_ffmpeg.get_ffmpeg_exe()
+except Exception:
+    FFMPEG_BINARY = shutil.which("ffmpeg")
+FFPROBE_BINARY = shutil.which("ffprobe")
 
 # Default whisper model settings
 DEFAULT_WHISPER_MODEL = "tiny"
+FASTER_WHISPER_GPU_MODEL = "distil-large-v3"  # Used instead on CUDA with faster-whisper; too slow for CPU
+WHISPER_FALLBACK_MODEL = "base"  # Loaded if the preferred model can't be downloaded or loaded
+WHISPER_BACKEND = "auto"       # "auto" uses faster-whisper when installed, "openai" always uses openai-whisper
+WHISPER_BEAM_SIZE = 5          # Beam width for faster-whisper decoding
+WHISPER_COMPUTE_TYPE = "auto"  # faster-whisper precision: "auto" (int8_float16 on GPU, int8 on CPU) or a CTranslate2 type
+USE_VAD = True                 # Skip non-speech audio with Silero VAD before decoding (faster-whisper only)
+VAD_MIN_SILENCE_MS = 500       # Shortest silence VAD treats as a break between speech chunks
+WHISPER_TORCH_COMPILE = False  # Compile the whisper decoder with torch.compile on CUDA (slow first load)
+WHISPER_COMPILE_WARMUP = 3     # Dummy transcriptions run after compiling so real audio hits the compiled graph
+WHISPER_BATCH_SIZE = 8         # Audio chunks decoded together on the GPU (CPU decodes sequentially)
+WHISPER_CPU_INT8 = True        # Run CPU transcription with int8 weights (faster-whisper, or quantized linear layers)
+# CPU inference threads: one per physical core, since hyperthreads add little to matmul throughput
+TORCH_CPU_THREADS = (psutil.cpu_count(logical=False) if PSUTIL_AVAILABLE else os.cpu_count()) or 2
+CLASSIFIER_INT8 = True         # Run the emotion classifier with dynamically quantized int8 linear layers
+CLASSIFIER_CACHE_SIZE = 8192   # Emotion predictions remembered by text, so repeated phrases are classified once
 
 # Highlight detection thresholds for emotions - much higher thresholds
 HIGHLIGHT_EMOTIONS = {
@@ -42,6 +75,35 @@ HIGHLIGHT_TIMING = {
     "default": (-2, 8)    # Default for other emotions
 }
 
+# Cache locations for decoded audio and other reusable results
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "clipper")
+AUDIO_MEMORY_CACHE_SIZE = 2  # Decoded waveforms kept in memory (about 230 MB per hour of audio)
+
+# Clip export settings
+CLIP_KEYFRAME_TOLERANCE = 0.5  # Max seconds a stream-copy cut may start early before re-encoding instead
+HWACCEL_ENCODER = "auto"       # "auto" to probe ffmpeg, or an encoder name such as "h264_nvenc" / "libx264"
+H264_ENCODERS = ['h264_nvenc', 'h264_videotoolbox', 'h264_qsv', 'h264_vaapi', 'libx264']  # In order of preference
+HWACCEL_BITRATE = "8M"         # Hardware encoders default to a low bitrate, so set one explicitly
+X264_PRESET = "veryfast"       # libx264 speed/quality trade-off for re-encoded clips
+# Encoder threads: one per physical core where psutil can tell, otherwise one per logical CPU
+DEFAULT_ENCODE_THREADS = max(2, (psutil.cpu_count(logical=False) if PSUTIL_AVAILABLE else os.cpu_count()) or 4)
+
+# Playback controls
+SLIDER_DEBOUNCE_MS = 30        # Timeline/volume slider moves are coalesced into one update per interval
+NAV_DEBOUNCE_MS = 40           # Rapid Prev/Next clicks only seek to the highlight selected last
+
+# Transcript typing animation
+TYPING_INTERVAL_MS = 30        # Time between typing animation updates
+TYPING_STEPS_PER_SEGMENT = 60  # Each segment is typed in about this many updates
+LIVE_TEXT_QUEUE_SIZE = 32      # Transcript messages the worker may queue before it waits for the UI
+LIVE_TEXT_POLL_MS = 50         # How often the UI drains the worker's message queue
+TRANSCRIPT_MAX_BLOCKS = 500    # Lines kept in the transcript view (the saved transcript keeps everything)
+
+# Highlight list
+HIGHLIGHTS_PAGE_SIZE = 100     # Entries rendered in the highlights list at once; navigation flips pages
+HOVER_THROTTLE_MS = 16         # Mouse moves over the list update the pointer at most this often
+REJECTS_PER_MEMORY_CLEANUP = 32  # Full garbage collection after this many rejected highlights
+
 # UI styling
 DARK_THEME_STYLESHEET = """
 QWidget {
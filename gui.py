@@ -1,54 +1,253 @@
 # Main GUI components for the Video Transcriber Editor
 
 import os
-import whisper
 import time
-import torch
+import queue
+import shutil
+import tempfile
+import numpy as np
+from collections import deque
+from functools import cache
 from PyQt5.QtWidgets import (
     QWidget, QPushButton, QTextEdit, QVBoxLayout, QHBoxLayout,
     QLabel, QProgressBar, QSlider, QStyle, QMessageBox,
-    QLineEdit, QFrame, QApplication, QFileDialog
+    QLineEdit, QFrame, QApplication, QFileDialog, QCheckBox
 )
-from PyQt5.QtCore import Qt, QUrl, QTimer, QDir
+from PyQt5.QtCore import Qt, QUrl, QTimer, QDir, QThread, pyqtSignal
 from PyQt5.QtGui import QTextCursor, QFont, QColor
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
 
-from config import DEFAULT_WHISPER_MODEL, DARK_THEME_STYLESHEET
-from utils import format_time, optimize_memory
+from config import (
+    DEFAULT_WHISPER_MODEL, FASTER_WHISPER_GPU_MODEL, WHISPER_FALLBACK_MODEL,
+    WHISPER_TORCH_COMPILE, WHISPER_COMPILE_WARMUP,
+    WHISPER_CPU_INT8, FASTER_WHISPER_AVAILABLE, WHISPER_BACKEND,
+    WHISPER_COMPUTE_TYPE, WHISPER_BATCH_SIZE, TORCH_CPU_THREADS,
+    TYPING_INTERVAL_MS, TYPING_STEPS_PER_SEGMENT, LIVE_TEXT_QUEUE_SIZE, LIVE_TEXT_POLL_MS,
+    TRANSCRIPT_MAX_BLOCKS, DARK_THEME_STYLESHEET
+)
+from utils import (
+    format_time, optimize_memory, cuda_supports_fp16, whisper_inference_context, is_faster_whisper_model
+)
 from media_player import MediaPlayerController
 from clip_editor import ClipEditor
 from highlight_manager import HighlightManager
-from transcription import TranscriptionWorker
+from highlight_store import HighlightStore
+from transcript_cache import (
+    load_cached_transcript, save_cached_transcript, remembered_model_name, remember_model_name
+)
+
+# whisper, torch and the transcription worker (which loads the emotion classifier) are imported
+# on first use so the window can paint before those multi-second imports run
+
+def _use_faster_whisper():
+    """Check if the CTranslate2 faster-whisper backend should be used instead of openai-whisper"""
+    return FASTER_WHISPER_AVAILABLE and WHISPER_BACKEND != "openai"
+
+def _faster_whisper_compute_type(device):
+    """Pick the CTranslate2 weight/activation precision for a device"""
+    if WHISPER_COMPUTE_TYPE != "auto":
+        return WHISPER_COMPUTE_TYPE
+    if device == "cuda":
+        # int8 weights with float16 activations on tensor-core GPUs, int8 with float32 activations otherwise
+        return "int8_float16" if cuda_supports_fp16() else "int8_float32"
+    return "int8" if WHISPER_CPU_INT8 else "float32"
+
+@cache
+def _get_whisper_model(name, device):
+    """Load a whisper model once per (name, device) and share it between windows"""
+    if _use_faster_whisper():
+        # CTranslate2's fused, quantized kernels are several times faster than the PyTorch reference model
+        from faster_whisper import WhisperModel
+        # CTranslate2 defaults to 4 CPU threads; use every physical core on the CPU path
+        cpu_threads = TORCH_CPU_THREADS if device != "cuda" else 0
+        model = WhisperModel(name, device=device, compute_type=_faster_whisper_compute_type(device),
+                             cpu_threads=cpu_threads)
+        if device != "cuda":
+            return model
+        try:
+            # Decode VAD-split chunks in GPU batches instead of one 30 second window at a time
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            # faster-whisper < 1.1
+            return model
+        return BatchedInferencePipeline(model=model)
+    
+    import whisper
+    import torch
+    _enable_whisper_sdpa()
+    model = whisper.load_model(name)
+    if device != "cuda":
+        if WHISPER_CPU_INT8:
+            model = _quantize_whisper_model(model)
+        return model
+    
+    # Whisper's conv front end always sees the same mel shape, so let cuDNN benchmark and keep the
+    # fastest algorithm; allow TF32 for any matmuls left in float32
+    torch.backends.cudnn.benchmark = True
+    torch.set_float32_matmul_precision("high")
+    
+    model = model.to(device)
+    if cuda_supports_fp16():
+        # Half precision weights halve memory traffic; inference runs under fp16 autocast
+        model = model.half()
+    if WHISPER_TORCH_COMPILE and hasattr(torch, "compile"):
+        try:
+            _compile_whisper_model(model)
+        except Exception as e:
+            print(f"torch.compile unavailable, using eager whisper model: {e}")
+    return model
+
+def _enable_whisper_sdpa():
+    """Route attention in older openai-whisper releases through PyTorch's fused SDPA kernels"""
+    import torch
+    from whisper.model import MultiHeadAttention
+    if hasattr(MultiHeadAttention, "use_sdpa") or not hasattr(torch.nn.functional, "scaled_dot_product_attention"):
+        # Newer whisper already uses scaled_dot_product_attention
+        return
+    
+    def qkv_attention(self, q, k, v, mask=None):
+        n_ctx = q.shape[1]
+        q = q.view(*q.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+        k = k.view(*k.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+        v = v.view(*v.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+        out = torch.nn.functional.scaled_dot_product_attention(q, k, v, is_causal=mask is not None and n_ctx > 1)
+        # No attention weights are returned; they are only needed for word-level timestamps
+        return out.permute(0, 2, 1, 3).flatten(start_dim=2), None
+    
+    MultiHeadAttention.qkv_attention = qkv_attention
+
+def _quantize_whisper_model(model):
+    """Dynamically quantize the whisper linear layers to int8 for CPU inference"""
+    import whisper
+    import torch
+    # whisper's Linear subclass only adds a dtype cast; quantize_dynamic only swaps exact nn.Linear modules
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _compile_whisper_model(model):
+    """Compile the whisper encoder and decoder and warm them up so the first real transcription is fast"""
+    import whisper
+    import torch
+    torch._inductor.config.fx_graph_cache = True
+    torch._inductor.config.coordinate_descent_tuning = True
+    # The encoder always sees fixed (n_mels x 3000) windows, so it can be captured whole as a CUDA graph
+    model.encoder = torch.compile(model.encoder, mode="reduce-overhead", fullgraph=True)
+    model.decoder = torch.compile(model.decoder, mode="reduce-overhead", fullgraph=False)
+    
+    # Record the encoder graph at the batch size the batched transcription path uses.
+    # Weights are already half precision on fp16 GPUs; fp16 autocast keeps whisper's LayerNorm
+    # (which upcasts its input) working with them, as in whisper_inference_context
+    use_fp16 = cuda_supports_fp16()
+    dtype = torch.float16 if use_fp16 else torch.float32
+    with whisper_inference_context("cuda", use_fp16):
+        for _ in range(WHISPER_COMPILE_WARMUP):
+            model.encoder(torch.zeros(WHISPER_BATCH_SIZE, model.dims.n_mels, whisper.audio.N_FRAMES,
+                                      device=model.device, dtype=dtype))
+        
+        # Trigger decoder compilation on a second of silence
+        silence = np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32)
+        for _ in range(WHISPER_COMPILE_WARMUP):
+            model.transcribe(silence, language="en", fp16=use_fp16)
+
+@cache
+def _detect_device():
+    """Pick the inference device once: CUDA when the speech backend can use a GPU, otherwise CPU"""
+    if _use_faster_whisper():
+        # Much lighter than importing torch just to ask about CUDA
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def _model_name_for_device(device):
+    """Choose the whisper checkpoint for a device"""
+    # distil-large-v3 is far more accurate than tiny and fast on a GPU, but much slower than tiny on CPU
+    if device == "cuda" and _use_faster_whisper():
+        return FASTER_WHISPER_GPU_MODEL
+    return DEFAULT_WHISPER_MODEL
+
+def _backend_name():
+    """Name of the speech backend, used in transcript cache keys"""
+    return "faster_whisper" if _use_faster_whisper() else "whisper"
+
+def _preferred_model_name():
+    """The checkpoint ModelLoader tries first"""
+    # Only faster-whisper picks its checkpoint by device, so openai-whisper never needs the
+    # torch import that detecting the device would cost
+    if not _use_faster_whisper():
+        return DEFAULT_WHISPER_MODEL
+    return _model_name_for_device(_detect_device())
+
+class ModelLoader(QThread):
+    """Worker thread that loads the speech recognition model without blocking the UI"""
+    loaded = pyqtSignal(object, str)
+    failed = pyqtSignal(str)
+
+    def run(self):
+        try:
+            device = _detect_device()
+            name = preferred_name = _model_name_for_device(device)
+            try:
+                model = _get_whisper_model(name, device)
+            except Exception as e:
+                if name == WHISPER_FALLBACK_MODEL:
+                    raise
+                # Usually a failed download of the larger checkpoint
+                print(f"Could not load whisper model {name}, falling back to {WHISPER_FALLBACK_MODEL}: {e}")
+                name = WHISPER_FALLBACK_MODEL
+                model = _get_whisper_model(name, device)
+            remember_model_name(f"{_backend_name()}:{preferred_name}", name)
+            self.loaded.emit(model, name)
+        except Exception as e:
+            self.failed.emit(str(e))
 
 class VideoTranscriberEditor(QWidget):
+    @classmethod
+    def _icons(cls):
+        """Play/pause icons, looked up from the application style once and shared by every window"""
+        if not hasattr(cls, "_icon_cache"):
+            style = QApplication.style()
+            cls._icon_cache = (style.standardIcon(QStyle.SP_MediaPlay), style.standardIcon(QStyle.SP_MediaPause))
+        return cls._icon_cache
+
     def __init__(self):
         super().__init__()  # Initialize the parent class (QWidget)
 
-        # Load the speech recognition model (whisper)
-        self.model = whisper.load_model(DEFAULT_WHISPER_MODEL)
-        if torch.cuda.is_available():
-            self.model = self.model.to("cuda")
+        # The speech recognition model (whisper) is loaded in the background on the first transcription,
+        # so users who only cut clips never pay its load time or VRAM. It is shared state: every window
+        # and every TranscriptionWorker uses the same cached instance, and it is never rebuilt between runs
+        self.model = None
+        self.model_loader = None
+        self.model_name = None  # Checkpoint name, known once the model has loaded
 
         # Initialize variables
         self.video_file_path = None
-        self.video_clip = None
+        self.video_source = None
         self.current_time = 0
         self.clip_start_time = None
         self.clip_end_time = None
         self.is_playing = False
         self.is_audio_only = False
         self.audio_path = None
-        self.full_text = ""
-        self.pending_segments = []
+        self.full_text_parts = []  # Transcript pieces, joined on demand by the full_text property
+        self._full_text = None
+        self.pending_segments = deque()
+        self._transcript_file = None  # Temp file the transcript is streamed to as it arrives
         self.current_typing_text = ""
         self.current_char_index = 0
-        self.highlights = []
+        self.highlights = HighlightStore()
         self.current_highlight_index = -1
 
         # Timer to control the typing animation
         self.typing_timer = QTimer()
         self.typing_timer.timeout.connect(self.type_next_character)
+        
+        # Timer that pulls transcript messages from the worker's bounded queue
+        self.text_poll_timer = QTimer()
+        self.text_poll_timer.timeout.connect(self.drain_worker_text)
 
         # Create a frame for the video player
         self.video_frame = QFrame()
@@ -74,6 +273,42 @@ class VideoTranscriberEditor(QWidget):
         # Apply theme
         self.apply_dark_theme()
 
+    def load_model(self):
+        """Load the speech recognition model in a background thread"""
+        if self.model_loader is not None and self.model_loader.isRunning():
+            return
+        self.model_loader = ModelLoader()
+        self.model_loader.loaded.connect(self.handle_model_loaded)
+        self.model_loader.failed.connect(self.handle_model_failed)
+        self.model_loader.start()
+
+    def handle_model_loaded(self, model, name):
+        """Store the loaded model and continue the transcription that requested it"""
+        self.model = model
+        self.model_name = name
+        QApplication.instance().aboutToQuit.connect(self.release_model)
+        if self.audio_path:
+            self.transcribe_video()
+
+    def release_model(self):
+        """Free the CTranslate2 weights on application shutdown (not between runs, so reuse stays warm)"""
+        if is_faster_whisper_model(self.model):
+            # BatchedInferencePipeline wraps the WhisperModel, which wraps the ctranslate2 model
+            whisper_model = self.model
+            if type(whisper_model).__name__ == "BatchedInferencePipeline":
+                whisper_model = whisper_model.model
+            try:
+                whisper_model.model.unload_model()
+            except Exception as e:
+                print(f"Model unload error: {e}")
+        self.model = None
+
+    def handle_model_failed(self, error_message):
+        """Report a model loading failure"""
+        self.status_label.setText("Speech model failed to load")
+        self.transcribe_button.setEnabled(self.audio_path is not None)
+        QMessageBox.critical(self, "Model Error", f"Failed to load speech model: {error_message}")
+
     def setup_window(self):
         """Set up the main application window properties"""
         self.setWindowTitle("Clipper v2.1 - Enhanced AI Highlight Detection")
@@ -92,8 +327,7 @@ class VideoTranscriberEditor(QWidget):
         
         # Play/pause button with icon
         self.play_button = QPushButton()
-        self.play_icon = self.style().standardIcon(QStyle.SP_MediaPlay)
-        self.pause_icon = self.style().standardIcon(QStyle.SP_MediaPause)
+        self.play_icon, self.pause_icon = VideoTranscriberEditor._icons()
         self.play_button.setIcon(self.play_icon)
         self.play_button.setFixedSize(40, 40)
         self.play_button.setEnabled(False)
@@ -107,23 +341,28 @@ class VideoTranscriberEditor(QWidget):
         # Label to show current playback time and total duration
         self.time_label = QLabel("00:00:00 / 00:00:00")
 
-        # Clip editing buttons
-        self.start_button = QPushButton("Mark Start")
-        self.start_button.setMinimumHeight(30)  # Reduced height
-        self.start_button.setEnabled(False)
-
-        self.end_button = QPushButton("Mark End")
-        self.end_button.setMinimumHeight(30)  # Reduced height
-        self.end_button.setEnabled(False)
-
-        # Preview and Save buttons
-        self.preview_button = QPushButton("Preview")
-        self.preview_button.setMinimumHeight(30)  # Reduced height
-        self.preview_button.setEnabled(False)
-
-        self.save_button = QPushButton("Save")
-        self.save_button.setMinimumHeight(30)  # Reduced height
-        self.save_button.setEnabled(False)
+        # Standard action buttons: same height, disabled until media or highlights are available
+        for attr, label in (
+            # Clip editing
+            ("start_button", "Mark Start"),
+            ("end_button", "Mark End"),
+            ("preview_button", "Preview"),
+            ("save_button", "Save"),
+            ("apply_manual_button", "Apply"),
+            # Transcription
+            ("transcribe_button", "Detect Highlights"),
+            ("save_transcript_button", "Save Transcript"),
+            # Highlight handling and navigation
+            ("cut_clip_button", "Cut"),
+            ("save_clip_button", "Save"),
+            ("reject_button", "Reject"),
+            ("prev_highlight_button", "← Prev"),
+            ("next_highlight_button", "Next →"),
+        ):
+            button = QPushButton(label)
+            button.setMinimumHeight(30)  # Reduced height
+            button.setEnabled(False)
+            setattr(self, attr, button)
 
         # Manual time entry for precise clip control
         self.start_label = QLabel("Start:")
@@ -134,22 +373,12 @@ class VideoTranscriberEditor(QWidget):
         self.end_entry = QLineEdit()
         self.end_entry.setMaximumWidth(80)
 
-        self.apply_manual_button = QPushButton("Apply")
-        self.apply_manual_button.setMinimumHeight(30)  # Reduced height
-        self.apply_manual_button.setEnabled(False)
-
         # Transcription section label
         self.transcription_label = QLabel("Transcription & AI Detection")
-        
-        # Transcription components
-        self.transcribe_button = QPushButton("Detect Highlights")
-        self.transcribe_button.setMinimumHeight(30)  # Reduced height
-        self.transcribe_button.setEnabled(False)
 
-        # Save Transcript button
-        self.save_transcript_button = QPushButton("Save Transcript")
-        self.save_transcript_button.setMinimumHeight(30)  # Reduced height
-        self.save_transcript_button.setEnabled(False)
+        # Ignore cached results from an earlier run on the same file
+        self.force_retranscribe_checkbox = QCheckBox("Force re-transcribe")
+        self.force_retranscribe_checkbox.setToolTip("Run transcription again even if this file was already analyzed")
 
         # Cancel Processing button (initially hidden)
         self.cancel_button = QPushButton("Cancel")
@@ -169,6 +398,8 @@ class VideoTranscriberEditor(QWidget):
         font.setPointSize(10)
         self.result_textbox.setFont(font)
         self.result_textbox.setMaximumHeight(100)  # Limit height for transcription
+        # Oldest lines are dropped so layout cost and memory stay constant on long videos
+        self.result_textbox.document().setMaximumBlockCount(TRANSCRIPT_MAX_BLOCKS)
 
         # Highlights section
         self.highlights_label = QLabel("AI-DETECTED HIGHLIGHTS")
@@ -182,28 +413,6 @@ class VideoTranscriberEditor(QWidget):
         self.highlights_textbox.setFont(QFont())
         self.highlights_textbox.setMinimumHeight(300)  # Increased height
 
-        # Buttons for handling highlights
-        self.cut_clip_button = QPushButton("Cut")
-        self.cut_clip_button.setMinimumHeight(30)  # Reduced height
-        self.cut_clip_button.setEnabled(False)
-
-        self.save_clip_button = QPushButton("Save")
-        self.save_clip_button.setMinimumHeight(30)  # Reduced height
-        self.save_clip_button.setEnabled(False)
-
-        self.reject_button = QPushButton("Reject")
-        self.reject_button.setMinimumHeight(30)  # Reduced height
-        self.reject_button.setEnabled(False)
-        
-        # Navigation buttons
-        self.prev_highlight_button = QPushButton("← Prev")
-        self.prev_highlight_button.setMinimumHeight(30)  # Reduced height
-        self.prev_highlight_button.setEnabled(False)
-        
-        self.next_highlight_button = QPushButton("Next →")
-        self.next_highlight_button.setMinimumHeight(30)  # Reduced height
-        self.next_highlight_button.setEnabled(False)
-
         # Volume control slider
         self.volume_label = QLabel("Vol:")
         self.volume_slider = QSlider(Qt.Horizontal)
@@ -288,6 +497,7 @@ class VideoTranscriberEditor(QWidget):
         transcription_buttons.addWidget(self.save_transcript_button)
         transcription_buttons.addWidget(self.cancel_button)
         right_section.addLayout(transcription_buttons)
+        right_section.addWidget(self.force_retranscribe_checkbox)
         
         right_section.addWidget(self.progress_bar)
         
@@ -334,7 +544,10 @@ class VideoTranscriberEditor(QWidget):
 
     def apply_dark_theme(self):
         """Apply a dark color theme to the application"""
-        self.setStyleSheet(DARK_THEME_STYLESHEET)
+        # Set once on the application (main.py does this at startup) instead of re-polishing this widget tree
+        app = QApplication.instance()
+        if app.styleSheet() != DARK_THEME_STYLESHEET:
+            app.setStyleSheet(DARK_THEME_STYLESHEET)
 
     def transcribe_video(self):
         """Start the transcription and highlight detection process"""
@@ -360,25 +573,49 @@ class VideoTranscriberEditor(QWidget):
         QApplication.processEvents()  # Update the UI immediately
 
         # Reset text variables
-        self.full_text = ""
+        self.full_text_parts.clear()
+        self._full_text = None
         self.pending_segments.clear()
+        self.open_transcript_file()
+
+        # Reuse the results of an earlier run on the same file unless asked not to
+        if not self.force_retranscribe_checkbox.isChecked():
+            cached = load_cached_transcript(self.audio_path, self.cache_model_name())
+            if cached is not None:
+                highlights, full_text = cached
+                self.typing_timer.stop()
+                self.animate_typing(full_text)
+                self.handle_transcription_finished(highlights)
+                self.status_label.setText(f"{self.status_label.text()} (cached)")
+                return
+
+        # Load the model on first use; handle_model_loaded calls back into this method
+        if self.model is None:
+            self.cancel_button.setVisible(False)
+            self.progress_bar.setVisible(False)
+            self.status_label.setText("Loading speech model... transcription will start automatically.")
+            self.load_model()
+            return
 
         # Create and start the worker thread for transcription
+        from transcription import TranscriptionWorker
         self.worker = TranscriptionWorker(self.model, self.audio_path)
         self.worker.progress.connect(self.update_progress)
-        self.worker.live_update.connect(self.animate_typing)
-        self.worker.finished.connect(self.handle_transcription_finished)
+        self.worker.finished.connect(self.handle_worker_finished)
         
         # Connect partial results signal for chunked processing
         self.worker.partial_results.connect(self.handle_partial_results)
         
         self.worker.start()
+        self.text_poll_timer.start(LIVE_TEXT_POLL_MS)
 
     def cancel_processing(self):
         """Cancel the transcription and highlight detection process"""
         if hasattr(self, 'worker') and self.worker.isRunning():
             self.status_label.setText("Cancelling processing... This may take a moment.")
-            self.worker.cancel()
+            # The worker checks the interruption flag between classification batches and
+            # while waiting for room in its transcript queue
+            self.worker.requestInterruption()
             
             # Disable cancel button while cancelling
             self.cancel_button.setText("Cancelling...")
@@ -388,8 +625,8 @@ class VideoTranscriberEditor(QWidget):
         """Handle partial results from processing chunks"""
         # Only use this the first time to allow early reviewing
         if not self.highlights:
-            self.highlights = partial_highlights
-            self.highlight_manager.highlights = partial_highlights
+            self.highlights = HighlightStore(partial_highlights)
+            self.highlight_manager.highlights = self.highlights
             
             # Display highlights
             self.highlight_manager.display_highlights()
@@ -406,8 +643,56 @@ class VideoTranscriberEditor(QWidget):
         """Update the progress bar when transcription advances"""
         self.progress_bar.setValue(value)
 
+    def open_transcript_file(self):
+        """Start a new temp file for the transcript, discarding the previous one"""
+        self.close_transcript_file()
+        self._transcript_file = tempfile.NamedTemporaryFile(
+            mode="w", delete=False, encoding="utf-8", buffering=1 << 20,
+            prefix="clipper_transcript_", suffix=".txt"
+        )
+
+    def close_transcript_file(self):
+        """Close and delete the transcript temp file"""
+        if self._transcript_file is None:
+            return
+        self._transcript_file.close()
+        try:
+            os.remove(self._transcript_file.name)
+        except OSError as e:
+            print(f"Transcript temp file cleanup error: {e}")
+        self._transcript_file = None
+
+    def closeEvent(self, event):
+        """Clean up temp files and patched event handlers when the window closes"""
+        # Nothing drains the transcript queue after this, so let a waiting worker give up
+        if hasattr(self, 'worker') and self.worker.isRunning():
+            self.text_poll_timer.stop()
+            self.worker.requestInterruption()
+        self.close_transcript_file()
+        self.highlight_manager.teardown()
+        super().closeEvent(event)
+
+    def drain_worker_text(self, limit=None):
+        """Move transcript messages from the worker's queue into the typing animation"""
+        # Stop taking messages while the typing backlog is full, which in turn makes the worker wait
+        if limit is None:
+            limit = LIVE_TEXT_QUEUE_SIZE - len(self.pending_segments)
+        text_queue = self.worker.text_queue
+        while limit > 0:
+            try:
+                self.animate_typing(text_queue.get_nowait())
+            except queue.Empty:
+                break
+            limit -= 1
+
     def animate_typing(self, new_text):
         """Create a typing animation for new text segments"""
+        # One line per segment, so the view can prune whole old segments
+        if not new_text.endswith("\n"):
+            new_text += "\n"
+        # Stream to disk as text arrives so saving never has to build the whole transcript
+        if self._transcript_file is not None:
+            self._transcript_file.write(new_text)
         if self.typing_timer.isActive():
             # If already typing, add this to queue
             self.pending_segments.append(new_text)
@@ -415,42 +700,84 @@ class VideoTranscriberEditor(QWidget):
             # Start typing this text
             self.current_typing_text = new_text
             self.current_char_index = 0
-            self.typing_timer.start(20)  # Type a character every 20ms
+            self.typing_timer.start(TYPING_INTERVAL_MS)
 
     def type_next_character(self):
-        """Type one character at a time for a more natural appearance"""
+        """Type the next few characters for a more natural appearance"""
         if self.current_char_index < len(self.current_typing_text):
-            # Add the next character to the full text
-            self.full_text += self.current_typing_text[self.current_char_index]
-            self.result_textbox.setPlainText(self.full_text)
-            self.result_textbox.moveCursor(QTextCursor.End)  # Scroll to end
-            self.current_char_index += 1
+            # Insert a small chunk at the end instead of re-setting the whole document.
+            # Type faster when segments are waiting so the animation never holds up the worker for long
+            steps = max(1, TYPING_STEPS_PER_SEGMENT // (1 + len(self.pending_segments)))
+            step = max(1, len(self.current_typing_text) // steps)
+            chunk = self.current_typing_text[self.current_char_index:self.current_char_index + step]
+            self.append_transcript_text(chunk)
+            self.result_textbox.moveCursor(QTextCursor.End)
+            self.result_textbox.insertPlainText(chunk)
+            self.result_textbox.ensureCursorVisible()  # Scroll to end
+            self.current_char_index += len(chunk)
         else:
             # Finished typing this segment
             self.typing_timer.stop()
             if self.pending_segments:
                 # Start typing the next segment if any
-                next_text = self.pending_segments.pop(0)
+                next_text = self.pending_segments.popleft()
                 self.current_typing_text = next_text
                 self.current_char_index = 0
-                self.typing_timer.start(20)
+                self.typing_timer.start(TYPING_INTERVAL_MS)
+
+    @property
+    def full_text(self):
+        """The full transcript, joined once and cached until more text is appended"""
+        if self._full_text is None:
+            self._full_text = "".join(self.full_text_parts)
+        return self._full_text
+
+    def append_transcript_text(self, text):
+        """Add text to the transcript without rebuilding the whole string"""
+        self.full_text_parts.append(text)
+        self._full_text = None
+
+    def cache_model_name(self):
+        """Name of the speech model and its backend, used in transcript cache keys"""
+        # Known before the model is loaded, so cache hits never need to load it
+        backend = _backend_name()
+        name = self.model_name
+        if name is None:
+            # If the preferred checkpoint fell back last time, results were saved under the fallback
+            preferred_name = _preferred_model_name()
+            name = remembered_model_name(f"{backend}:{preferred_name}") or preferred_name
+        return f"{backend}:{name}"
+
+    def handle_worker_finished(self, detected_highlights):
+        """Cache the results of a complete transcription run, then display them"""
+        # Pick up whatever the worker queued after the last poll
+        self.text_poll_timer.stop()
+        self.drain_worker_text(limit=float("inf"))
+        # Everything emitted so far, including text the typing animation hasn't reached yet
+        full_text = (self.full_text + self.current_typing_text[self.current_char_index:] +
+                     "".join(self.pending_segments))
+        # A cancelled run or one whose classification failed has partial highlights; caching
+        # them would replay the gap on every later run
+        if self.worker.completed:
+            save_cached_transcript(self.audio_path, self.cache_model_name(), detected_highlights, full_text)
+        self.handle_transcription_finished(detected_highlights)
+        if self.worker.isInterruptionRequested():
+            self.status_label.setText("Processing cancelled.")
 
     def handle_transcription_finished(self, detected_highlights):
         """Handle when the transcription and highlight detection is finished"""
-        self.highlights = detected_highlights
-        self.highlight_manager.highlights = detected_highlights
+        self.highlights = HighlightStore(detected_highlights)
+        self.highlight_manager.highlights = self.highlights
         
         # Hide the cancel button and re-enable transcribe button
         self.cancel_button.setVisible(False)
         self.transcribe_button.setEnabled(True)
         
         # Group highlights by emotion type for summary
-        emotion_counts = {}
-        for _, _, _, emotion in detected_highlights:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        emotion_counts = self.highlights.most_common_emotions()
         
         if emotion_counts:
-            emotion_summary = ", ".join([f"{count} {emotion}" for emotion, count in emotion_counts.items()])
+            emotion_summary = ", ".join(f"{count} {emotion}" for emotion, count in emotion_counts)
             summary = f"Transcription complete! {len(detected_highlights)} highlights detected: {emotion_summary}"
         else:
             summary = f"Transcription complete! {len(detected_highlights)} highlights detected."
@@ -470,20 +797,27 @@ class VideoTranscriberEditor(QWidget):
         else:
             self.highlights_textbox.setPlainText("No highlights detected in this video.")
             
-        # Complete typing any remaining text
-        if self.pending_segments:
-            for segment in self.pending_segments:
-                self.full_text += segment
-            self.result_textbox.setPlainText(self.full_text)
-            self.result_textbox.moveCursor(QTextCursor.End)
-            self.pending_segments.clear()
+        # Complete typing any remaining text, inserting only the untyped tail instead of re-laying out the document
+        self.typing_timer.stop()
+        tail = self.current_typing_text[self.current_char_index:] + "".join(self.pending_segments)
+        self.current_char_index = len(self.current_typing_text)
+        self.pending_segments.clear()
+        if tail:
+            self.append_transcript_text(tail)
+            cursor = self.result_textbox.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(tail)
+            self.result_textbox.setTextCursor(cursor)
+            self.result_textbox.ensureCursorVisible()
             
         # Clean up memory
         optimize_memory()
 
     def save_transcript(self):
         """Save the full transcript to a text file"""
-        if not self.full_text:
+        if self._transcript_file is not None:
+            self._transcript_file.flush()
+        if self._transcript_file is None or os.path.getsize(self._transcript_file.name) == 0:
             QMessageBox.warning(self, "No Transcript", "There is no transcript to save.")
             return
             
@@ -495,8 +829,7 @@ class VideoTranscriberEditor(QWidget):
         
         if filename:
             try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(self.full_text)
+                shutil.copyfile(self._transcript_file.name, filename)
                 self.status_label.setText(f"Transcript saved to {os.path.basename(filename)}")
             except Exception as e:
                 QMessageBox.critical(self, "Save Error", f"Failed to save transcript: {str(e)}")
@@ -2,8 +2,24 @@
 
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtGui import QTextCursor
-from PyQt5.QtCore import Qt
-from utils import format_time, optimize_memory
+from PyQt5.QtCore import Qt, QTimer, QSignalBlocker
+from PyQt5.QtMultimedia import QMediaPlayer
+from config import NAV_DEBOUNCE_MS, HIGHLIGHTS_PAGE_SIZE, HOVER_THROTTLE_MS, REJECTS_PER_MEMORY_CLEANUP
+from utils import optimize_memory
+from highlight_store import HighlightStore
+
+# Line drawn under each entry in the highlights list
+_HIGHLIGHT_SEPARATOR = "-" * 50 + "<br><br>"
+
+# One entry of the highlights list: the timestamp line is underlined in a different colour
+# so it stands out, and each entry is its own block, as with append()
+_HIGHLIGHT_ROW_TEMPLATE = (
+    '<div><span style="color:#ff9933; text-decoration:underline; font-weight:bold;">'
+    'Highlight #{number}: {start} to {end} ({duration:.1f}s)</span><br>'
+    '<b>Emotion:</b> {emotion}<br>'
+    '<b>Text:</b> {text}<br>'
+    + _HIGHLIGHT_SEPARATOR + '</div>'
+)
 
 class HighlightManager:
     def __init__(self, parent):
@@ -13,8 +29,37 @@ class HighlightManager:
             parent: The parent VideoTranscriberEditor instance
         """
         self.parent = parent
-        self.highlights = []
+        self.highlights = HighlightStore()
         self.current_highlight_index = -1
+        self._html_cache = None  # (cache key, html) of the last displayed highlight list
+        self._highlight_positions = []  # Document position of each displayed "Highlight #N:" line
+        self._view_start = 0  # Index of the first highlight on the displayed page
+        self._first_entry_block = 0  # Block number of the first displayed entry (one block per entry)
+        self._rejects_since_cleanup = 0  # A full garbage collection is too slow to run on every reject
+        self._view_store = None  # Store the current page belongs to, so a new store starts at page one
+        
+        # Bursts of Prev/Next clicks are collapsed into one jump once the clicking stops
+        self._nav_timer = QTimer(self.parent)
+        self._nav_timer.setSingleShot(True)
+        self._nav_timer.setInterval(NAV_DEBOUNCE_MS)
+        self._nav_timer.timeout.connect(self.jump_to_current_highlight)
+        self._pending_seek_ms = None  # Seek deferred while the player is buffering
+        
+        # Mouse moves over the list are coalesced into one pointer update per tick
+        self._hover_pos = None
+        self._hover_timer = QTimer(self.parent)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(HOVER_THROTTLE_MS)
+        self._hover_timer.timeout.connect(self.apply_hover_cursor)
+        
+        # Buttons that only make sense while there are highlights to review
+        self._review_buttons = (
+            self.parent.cut_clip_button,
+            self.parent.save_clip_button,
+            self.parent.reject_button,
+            self.parent.prev_highlight_button,
+            self.parent.next_highlight_button,
+        )
         
         # Connect signals
         self.connect_signals()
@@ -29,67 +74,202 @@ class HighlightManager:
         self.parent.reject_button.clicked.connect(self.handle_highlight_reject)
         self.parent.prev_highlight_button.clicked.connect(self.go_to_previous_highlight)
         self.parent.next_highlight_button.clicked.connect(self.go_to_next_highlight)
+        self.parent.media_player.mediaStatusChanged.connect(self.handle_media_status_changed)
     
     def setup_highlight_events(self):
         """Set up highlight textbox mouse events"""
+        # Only patch the textbox once, so handlers never end up wrapping each other
+        textbox = self.parent.highlights_textbox
+        if getattr(textbox, "_highlight_events_patched", False):
+            return
+        textbox._highlight_events_patched = True
+        
         # Store the original mouse double click event handler
-        self.original_double_click = self.parent.highlights_textbox.mouseDoubleClickEvent
+        self.original_double_click = textbox.mouseDoubleClickEvent
         # Replace with our custom handler
-        self.parent.highlights_textbox.mouseDoubleClickEvent = self.highlight_double_clicked
+        textbox.mouseDoubleClickEvent = self.highlight_double_clicked
         
         # Add hover tracking to show cursor changes
-        self.parent.highlights_textbox.setMouseTracking(True)
-        self.original_mouse_move = self.parent.highlights_textbox.mouseMoveEvent
-        self.parent.highlights_textbox.mouseMoveEvent = self.highlight_mouse_move
+        textbox.setMouseTracking(True)
+        self.original_mouse_move = textbox.mouseMoveEvent
+        textbox.mouseMoveEvent = self.highlight_mouse_move
+    
+    def teardown(self):
+        """Restore the textbox event handlers replaced in setup_highlight_events"""
+        textbox = self.parent.highlights_textbox
+        if not getattr(textbox, "_highlight_events_patched", False):
+            return
+        textbox.mouseDoubleClickEvent = self.original_double_click
+        textbox.mouseMoveEvent = self.original_mouse_move
+        textbox._highlight_events_patched = False
+        self._nav_timer.stop()
+        self._hover_timer.stop()
     
     def highlight_mouse_move(self, event):
         """Handle mouse movement over highlights to show pointer cursor"""
-        cursor = self.parent.highlights_textbox.cursorForPosition(event.pos())
-        cursor.select(QTextCursor.LineUnderCursor)
-        line = cursor.selectedText()
+        # Only remember the position; the pointer is updated once the throttle timer fires
+        self._hover_pos = event.pos()
+        if not self._hover_timer.isActive():
+            self._hover_timer.start()
+    
+    def apply_hover_cursor(self):
+        """Show a pointing hand over highlight entries and the text cursor elsewhere"""
+        if self._hover_pos is None:
+            return
         
-        # Change cursor if over a timestamp line
-        if "Highlight #" in line:
-            self.parent.highlights_textbox.viewport().setCursor(Qt.PointingHandCursor)
-        else:
-            self.parent.highlights_textbox.viewport().setCursor(Qt.IBeamCursor)
+        shape = Qt.PointingHandCursor if self.highlight_index_at_pos(self._hover_pos) >= 0 else Qt.IBeamCursor
+        viewport = self.parent.highlights_textbox.viewport()
+        
+        # Setting the same cursor again still makes Qt update it, so skip that
+        if viewport.cursor().shape() != shape:
+            viewport.setCursor(shape)
+    
+    def highlight_index_at_pos(self, pos):
+        """Return the index of the highlight entry under a viewport position, or -1"""
+        block = self.parent.highlights_textbox.cursorForPosition(pos).block()
+        
+        # Entries are consecutive blocks, so the block number maps straight to an entry
+        entry = block.blockNumber() - self._first_entry_block
+        if 0 <= entry < len(self._highlight_positions) and block.position() == self._highlight_positions[entry]:
+            highlight_index = self._view_start + entry
+            if highlight_index < len(self.highlights):
+                return highlight_index
+        return -1
     
     def display_highlights(self):
         """Display highlights in the highlights text box"""
-        self.parent.highlights_textbox.clear()
-        
         if not self.highlights:
             self.parent.highlights_textbox.setPlainText("No highlights detected.")
             return
-            
+        
+        # Only one page of entries is rendered; keep the page start valid for the current store
+        if self._view_store is not self.highlights:
+            self._view_store = self.highlights
+            self._view_start = 0
+        last_page_start = (len(self.highlights) - 1) // HIGHLIGHTS_PAGE_SIZE * HIGHLIGHTS_PAGE_SIZE
+        self._view_start = min(self._view_start, last_page_start)
+        
+        # Rebuild the HTML only if the highlights or the page changed since the last display
+        cache_key = (id(self.highlights), self.highlights.version, len(self.highlights), self._view_start)
+        if self._html_cache is None or self._html_cache[0] != cache_key:
+            self._html_cache = (cache_key, self.build_highlights_html())
+        
+        # One parse and layout pass for the whole list instead of one per appended highlight.
+        # Repaints and the textbox's text/cursor signals are held until the new list is in place
+        textbox = self.parent.highlights_textbox
+        textbox.setUpdatesEnabled(False)
+        textbox.blockSignals(True)
+        try:
+            textbox.setHtml(self._html_cache[1])
+        finally:
+            textbox.blockSignals(False)
+            textbox.setUpdatesEnabled(True)
+            textbox.viewport().update()
+        
+        # Remember where each entry starts so navigation never has to search the document
+        self._highlight_positions = []
+        block = textbox.document().begin()
+        while block.isValid():
+            if block.text().startswith("Highlight #"):
+                if not self._highlight_positions:
+                    self._first_entry_block = block.blockNumber()
+                self._highlight_positions.append(block.position())
+            block = block.next()
+    
+    def view_range(self):
+        """Return the (start, end) indexes of the highlights on the displayed page"""
+        return self._view_start, min(self._view_start + HIGHLIGHTS_PAGE_SIZE, len(self.highlights))
+    
+    def build_highlights_html(self):
+        """Build the HTML for the summary header and the highlight entries on the current page"""
+        view_start, view_end = self.view_range()
+        parts = [None] * (view_end - view_start + 1)
+        
         # Add a summary header
-        emotion_counts = {}
-        for _, _, _, emotion in self.highlights:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-            
+        parts[0] = f"<h3>{self.summary_header_text()}</h3><hr>"
+        
+        # Bind loop constants once instead of looking them up for every entry
+        formatted_times = self.highlights.formatted_times
+        escaped_text = self.highlights.escaped_text
+        row = _HIGHLIGHT_ROW_TEMPLATE.format
+        
+        # Fill the entry template once per highlight
+        for i in range(view_start, view_end):
+            start, end, _, emotion = self.highlights[i]
+            start_text, end_text = formatted_times(i)
+            parts[i - view_start + 1] = row(number=i + 1, start=start_text, end=end_text,
+                                            duration=end - start, emotion=emotion, text=escaped_text(i))
+        
+        return "".join(parts)
+    
+    def summary_header_text(self):
+        """Return the "Found N highlights: ..." summary line (counted in numpy by the highlight store)"""
         summary_parts = []
-        for emotion, count in emotion_counts.items():
+        for emotion, count in self.highlights.emotion_counts():
             summary_parts.append(f"{count} {emotion}")
         
         summary = ", ".join(summary_parts)
-        self.parent.highlights_textbox.append(f"<h3>Found {len(self.highlights)} highlights: {summary}</h3>")
-        self.parent.highlights_textbox.append("<hr>")
+        header = f"Found {len(self.highlights)} highlights: {summary}"
+        if len(self.highlights) > HIGHLIGHTS_PAGE_SIZE:
+            view_start, view_end = self.view_range()
+            header += f" (showing #{view_start + 1}-{view_end}, use Prev/Next for more)"
+        return header
+    
+    def remove_highlight_entry(self, index):
+        """Delete one entry from the displayed list and renumber the entries after it
         
-        # Format for improved timestamp visibility
-        for i, (start, end, text, emotion) in enumerate(self.highlights):
-            # Create a timestamp that stands out
-            highlight_num = i + 1
-            duration = end - start
-            timestamp_text = f"Highlight #{highlight_num}: {format_time(start)} to {format_time(end)} ({duration:.1f}s)"
-            
-            # Format the text with HTML to style the timestamp differently
-            # Use underline and different color for timestamp
-            formatted_text = f'<span style="color:#ff9933; text-decoration:underline; font-weight:bold;">{timestamp_text}</span><br>'
-            formatted_text += f"<b>Emotion:</b> {emotion}<br>"
-            formatted_text += f"<b>Text:</b> {text}<br>"
-            formatted_text += "-" * 50 + "<br><br>"
-            
-            self.parent.highlights_textbox.append(formatted_text)
+        Only the removed block, the "#N" labels after it and the summary line are edited,
+        instead of regenerating and re-parsing the HTML for every remaining highlight.
+        
+        Args:
+            index: Index the removed highlight had before it was popped from the store
+        """
+        positions = self._highlight_positions
+        if self._view_start != 0 or len(positions) != len(self.highlights) + 1:
+            # The list is paged or out of step with the store, so re-render the page
+            self.display_highlights()
+            return
+        
+        textbox = self.parent.highlights_textbox
+        document = textbox.document()
+        textbox.setUpdatesEnabled(False)
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        
+        # Remove the entry's block (the last entry also takes the block break before it)
+        if index + 1 < len(positions):
+            start, end = positions[index], positions[index + 1]
+        else:
+            start, end = positions[index] - 1, document.characterCount() - 1
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        shift = start - end
+        
+        # Renumber the following entries in place, tracking how far each one moved
+        new_positions = positions[:index]
+        number_offset = len("Highlight #")
+        for new_index in range(index, len(positions) - 1):
+            position = positions[new_index + 1] + shift
+            old_label, new_label = str(new_index + 2), str(new_index + 1)
+            cursor.setPosition(position + number_offset)
+            cursor.setPosition(position + number_offset + len(old_label), QTextCursor.KeepAnchor)
+            cursor.insertText(new_label)
+            shift += len(new_label) - len(old_label)
+            new_positions.append(position)
+        
+        # Rewrite the summary line, which comes before every entry
+        header = document.firstBlock()
+        old_length = header.length() - 1
+        header_text = self.summary_header_text()
+        cursor.setPosition(header.position())
+        cursor.setPosition(header.position() + old_length, QTextCursor.KeepAnchor)
+        cursor.insertText(header_text)
+        header_shift = len(header_text) - old_length
+        
+        cursor.endEditBlock()
+        textbox.setUpdatesEnabled(True)
+        self._highlight_positions = [position + header_shift for position in new_positions]
     
     def go_to_next_highlight(self):
         """Navigate to the next highlight in the list"""
@@ -103,8 +283,8 @@ class HighlightManager:
             # Wrap around to the first highlight
             self.current_highlight_index = 0
             
-        # Jump to this highlight
-        self.jump_to_current_highlight()
+        # Jump to this highlight once the clicks settle (restarting cancels the pending jump)
+        self._nav_timer.start()
     
     def go_to_previous_highlight(self):
         """Navigate to the previous highlight in the list"""
@@ -118,8 +298,8 @@ class HighlightManager:
             # Wrap around to the last highlight
             self.current_highlight_index = len(self.highlights) - 1
             
-        # Jump to this highlight
-        self.jump_to_current_highlight()
+        # Jump to this highlight once the clicks settle (restarting cancels the pending jump)
+        self._nav_timer.start()
     
     def jump_to_current_highlight(self):
         """Jump to the currently selected highlight"""
@@ -130,14 +310,13 @@ class HighlightManager:
             start_time, end_time, text, emotion = self.highlights[self.current_highlight_index]
             
             # Jump to the start time in the video
-            self.parent.media_player.setPosition(int(start_time * 1000))
+            self.seek_to(int(start_time * 1000))
             self.parent.current_time = start_time
             
             # Set this as the current clip start/end times
             self.parent.clip_start_time = start_time
             self.parent.clip_end_time = end_time
-            self.parent.start_entry.setText(format_time(start_time))
-            self.parent.end_entry.setText(format_time(end_time))
+            self.set_clip_entries(self.current_highlight_index)
             self.parent.clip_editor.update_clip_controls()
             
             # Highlight the text in the textbox
@@ -147,44 +326,75 @@ class HighlightManager:
             duration = end_time - start_time
             self.parent.status_label.setText(f"Viewing {emotion} highlight #{self.current_highlight_index+1}/{len(self.highlights)} - {duration:.1f}s")
     
+    def set_clip_entries(self, index):
+        """Show highlight index's times in the start/end boxes without firing their edit signals"""
+        start_text, end_text = self.highlights.formatted_times(index)
+        with QSignalBlocker(self.parent.start_entry), QSignalBlocker(self.parent.end_entry):
+            self.parent.start_entry.setText(start_text)
+            self.parent.end_entry.setText(end_text)
+    
+    def playing_highlight_index(self, time):
+        """Return the index of the highlight playing at time, or -1 (a binary search over the times)
+        
+        Display only: the selected highlight is what Prev/Next, Save and Reject act on, and it
+        only changes when the user picks one, never because the playhead moved
+        """
+        return self.highlights.highlight_index_at(time)
+    
+    def seek_to(self, position_ms):
+        """Seek the player, deferring the seek while it is buffering so seeks don't pile up"""
+        if self.parent.media_player.mediaStatus() == QMediaPlayer.BufferingMedia:
+            self._pending_seek_ms = position_ms
+        else:
+            self._pending_seek_ms = None
+            self.parent.media_player.setPosition(position_ms)
+    
+    def handle_media_status_changed(self, status):
+        """Apply a seek that was deferred while the player was buffering"""
+        if status != QMediaPlayer.BufferingMedia and self._pending_seek_ms is not None:
+            position_ms = self._pending_seek_ms
+            self._pending_seek_ms = None
+            self.parent.media_player.setPosition(position_ms)
+    
     def highlight_in_textbox(self, highlight_num):
         """Highlight the specified highlight number in the text box"""
-        # Find the highlight in the text box
-        highlight_text = f"Highlight #{highlight_num}:"
+        if not 0 < highlight_num <= len(self.highlights):
+            return
         
-        # Get the current text
-        full_text = self.parent.highlights_textbox.toPlainText()
+        # Flip to the page holding this highlight if it isn't displayed
+        view_start, view_end = self.view_range()
+        if not view_start < highlight_num <= view_end:
+            self._view_start = (highlight_num - 1) // HIGHLIGHTS_PAGE_SIZE * HIGHLIGHTS_PAGE_SIZE
+            self.display_highlights()
+            view_start = self._view_start
         
-        # Find the position of the highlight
-        cursor = self.parent.highlights_textbox.textCursor()
-        cursor.setPosition(0)
-        self.parent.highlights_textbox.setTextCursor(cursor)
+        entry = highlight_num - 1 - view_start
+        if not 0 <= entry < len(self._highlight_positions):
+            return
         
-        # Use the find method to locate and select the highlight
-        if self.parent.highlights_textbox.find(highlight_text):
-            # The text is now selected - make sure it's visible
-            self.parent.highlights_textbox.ensureCursorVisible()
+        # Select the timestamp line using the position recorded when the list was displayed.
+        # Selecting and scrolling happen with updates off so they land in a single repaint
+        textbox = self.parent.highlights_textbox
+        textbox.setUpdatesEnabled(False)
+        cursor = textbox.textCursor()
+        cursor.setPosition(self._highlight_positions[entry])
+        cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
+        textbox.setTextCursor(cursor)
+        
+        # The text is now selected - make sure it's visible
+        textbox.ensureCursorVisible()
+        textbox.setUpdatesEnabled(True)
     
     def highlight_double_clicked(self, event):
         """Handle double-click on a highlight entry"""
-        cursor = self.parent.highlights_textbox.cursorForPosition(event.pos())
-        cursor.select(QTextCursor.LineUnderCursor)
-        selected_line = cursor.selectedText()
-        
-        # Check if the selected line contains a highlight time
-        if "Highlight #" in selected_line:
-            try:
-                # Extract highlight number
-                highlight_num = int(selected_line.split("Highlight #")[1].split(":")[0]) - 1
-                if 0 <= highlight_num < len(self.highlights):
-                    # Set as the current highlight index and jump to it
-                    self.current_highlight_index = highlight_num
-                    self.jump_to_current_highlight()
-                    
-                    # Auto-preview the highlight
-                    self.preview_current_highlight()
-            except Exception as e:
-                print(f"Error processing highlight click: {e}")
+        highlight_index = self.highlight_index_at_pos(event.pos())
+        if highlight_index >= 0:
+            # Set as the current highlight index and jump to it
+            self.current_highlight_index = highlight_index
+            self.jump_to_current_highlight()
+            
+            # Auto-preview the highlight
+            self.preview_current_highlight()
     
     def preview_current_highlight(self):
         """Preview the current highlight"""
@@ -194,14 +404,9 @@ class HighlightManager:
         if 0 <= self.current_highlight_index < len(self.highlights):
             start_time, end_time, text, emotion = self.highlights[self.current_highlight_index]
             
-            # Seek to start time and play
-            self.parent.media_player.setPosition(int(start_time * 1000))
-            self.parent.media_player.play()
-            
-            # Set a timer to stop at end time
-            duration_ms = int((end_time - start_time) * 1000)
-            from PyQt5.QtCore import QTimer
-            QTimer.singleShot(duration_ms, self.parent.media_player.pause)
+            # Seek to start time and play; the clip editor pauses when the playback position
+            # reaches the end time, and forgets the stop if playback is paused first
+            self.parent.clip_editor.start_preview(start_time, end_time)
     
     def handle_highlight_cut(self):
         """Handle cutting the current highlight directly"""
@@ -225,8 +430,7 @@ class HighlightManager:
             start_time, end_time, title, emotion = self.highlights[self.current_highlight_index]
             self.parent.clip_start_time = start_time
             self.parent.clip_end_time = end_time
-            self.parent.start_entry.setText(format_time(start_time))
-            self.parent.end_entry.setText(format_time(end_time))
+            self.set_clip_entries(self.current_highlight_index)
             self.parent.clip_editor.update_clip_controls()
             
             # Show confirmation with duration
@@ -246,22 +450,27 @@ class HighlightManager:
             # Remove the highlight
             self.highlights.pop(self.current_highlight_index)
             
-            # Update display
-            self.display_highlights()
-            
             # Status update
             self.parent.status_label.setText(f"Removed highlight #{removed_idx}. {len(self.highlights)} highlights remaining.")
             
             # Handle case where all highlights are removed
             if not self.highlights:
-                self.parent.cut_clip_button.setEnabled(False)
-                self.parent.save_clip_button.setEnabled(False)
-                self.parent.reject_button.setEnabled(False)
-                self.parent.prev_highlight_button.setEnabled(False)
-                self.parent.next_highlight_button.setEnabled(False)
+                # Freeze repaints so the button states and message change in one update
+                self.parent.setUpdatesEnabled(False)
+                for button in self._review_buttons:
+                    if button.isEnabled():
+                        button.setEnabled(False)
                 self.parent.highlights_textbox.setPlainText("All highlights have been reviewed.")
+                self.parent.setUpdatesEnabled(True)
+                self._highlight_positions = []
                 self.current_highlight_index = -1
+                
+                # Review is finished, so this is a good moment for the deferred cleanup
+                self._rejects_since_cleanup = REJECTS_PER_MEMORY_CLEANUP
             else:
+                # Update display by deleting just the removed entry
+                self.remove_highlight_entry(removed_idx - 1)
+                
                 # Adjust current index if needed
                 if self.current_highlight_index >= len(self.highlights):
                     self.current_highlight_index = len(self.highlights) - 1
@@ -269,8 +478,11 @@ class HighlightManager:
                 # Jump to new current highlight
                 self.jump_to_current_highlight()
                 
-        # Clean up memory
-        optimize_memory()
+            # Clean up memory once every few rejects rather than stalling on each one
+            self._rejects_since_cleanup += 1
+            if self._rejects_since_cleanup >= REJECTS_PER_MEMORY_CLEANUP:
+                self._rejects_since_cleanup = 0
+                optimize_memory()
 
 '''
 
@@ -0,0 +1,109 @@
+# Compact storage for detected highlights
+
+from html import escape
+
+import numpy as np
+from utils import format_time
+
+class HighlightStore:
+    def __init__(self, highlights=()):
+        """Store (start, end, text, emotion) highlights as parallel arrays
+
+        Start/end times are kept in numpy arrays and emotions as small integer ids into a
+        per-store vocabulary, so counting and time lookups run in numpy instead of over
+        Python tuples. Indexing and iteration still return (start, end, text, emotion) tuples.
+
+        Args:
+            highlights: Optional iterable of (start, end, text, emotion) tuples
+        """
+        highlights = list(highlights)
+        self.version = 0  # Bumped on every change so views can tell when cached output is stale
+        self.emotion_vocab = []  # Emotion labels in first-seen order
+        self._emotion_lookup = {}
+        self.starts = np.array([h[0] for h in highlights], dtype=np.float64)
+        self.ends = np.array([h[1] for h in highlights], dtype=np.float64)
+        self.texts = [h[2] for h in highlights]
+        self.emotion_ids = np.array([self._emotion_id(h[3]) for h in highlights], dtype=np.int16)
+        self._formatted = [None] * len(self.texts)  # (start, end) as HH:MM:SS, filled on first use
+        self._escaped_texts = [None] * len(self.texts)  # HTML-escaped texts, filled on first use
+
+    def _emotion_id(self, emotion):
+        """Return the vocabulary id for an emotion label, adding it if new"""
+        emotion_id = self._emotion_lookup.get(emotion)
+        if emotion_id is None:
+            emotion_id = len(self.emotion_vocab)
+            self.emotion_vocab.append(emotion)
+            self._emotion_lookup[emotion] = emotion_id
+        return emotion_id
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        """Return highlight index as a (start, end, text, emotion) tuple"""
+        return (float(self.starts[index]), float(self.ends[index]), self.texts[index],
+                self.emotion_vocab[self.emotion_ids[index]])
+
+    def __iter__(self):
+        emotions = [self.emotion_vocab[i] for i in self.emotion_ids]
+        return zip(self.starts.tolist(), self.ends.tolist(), self.texts, emotions)
+
+    def pop(self, index):
+        """Remove and return the highlight at index"""
+        if index < 0:
+            index += len(self)
+        highlight = self[index]
+        self.starts = np.delete(self.starts, index)
+        self.ends = np.delete(self.ends, index)
+        del self.texts[index]
+        del self._formatted[index]
+        del self._escaped_texts[index]
+        self.emotion_ids = np.delete(self.emotion_ids, index)
+        self.version += 1
+        return highlight
+
+    def formatted_times(self, index):
+        """Return highlight index's (start, end) formatted as HH:MM:SS, formatting each only once"""
+        formatted = self._formatted[index]
+        if formatted is None:
+            formatted = (format_time(self.starts[index]), format_time(self.ends[index]))
+            self._formatted[index] = formatted
+        return formatted
+
+    def escaped_text(self, index):
+        """Return highlight index's text escaped for HTML, escaping it only once"""
+        escaped = self._escaped_texts[index]
+        if escaped is None:
+            escaped = escape(self.texts[index])
+            self._escaped_texts[index] = escaped
+        return escaped
+
+    def clear(self):
+        """Remove all highlights"""
+        version = self.version
+        self.__init__()
+        self.version = version + 1
+
+    def emotion_counts(self):
+        """Return (emotion, count) pairs in the order each emotion was first seen"""
+        counts = np.bincount(self.emotion_ids, minlength=len(self.emotion_vocab))
+        return [(self.emotion_vocab[i], int(c)) for i, c in enumerate(counts) if c]
+
+    def most_common_emotions(self):
+        """Return (emotion, count) pairs from most to least common, ties in first-seen order"""
+        return sorted(self.emotion_counts(), key=lambda pair: -pair[1])
+
+    def find_highlight_at(self, time):
+        """Return the index of the first highlight ending at or after time (len(self) if none)
+
+        Highlights are stored in chronological order, so this is a binary search over the
+        end times rather than a scan over every highlight.
+        """
+        return int(np.searchsorted(self.ends, time))
+
+    def highlight_index_at(self, time):
+        """Return the index of the highlight playing at time, or -1 if time is between highlights"""
+        index = self.find_highlight_at(time)
+        if index < len(self) and self.starts[index] <= time:
+            return index
+        return -1
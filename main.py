@@ -4,9 +4,11 @@
 import sys
 from PyQt5.QtWidgets import QApplication
 from gui import VideoTranscriberEditor
+from config import DARK_THEME_STYLESHEET
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.setStyleSheet(DARK_THEME_STYLESHEET)  # Parsed once and shared by every widget
     window = VideoTranscriberEditor()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,12 +1,67 @@
 # Media player functionality for video and audio playback
 
 import os
-from PyQt5.QtCore import QUrl, Qt, QTimer, QDir
+from PyQt5.QtCore import QUrl, Qt, QTimer, QDir, QThread, pyqtSignal
 from PyQt5.QtWidgets import QMessageBox, QFileDialog, QApplication
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from moviepy.editor import VideoFileClip
+from config import PYAV_AVAILABLE, SLIDER_DEBOUNCE_MS
 from utils import format_time
 
+if PYAV_AVAILABLE:
+    import av
+
+# Files with these extensions are played as audio only (str.endswith accepts the tuple directly)
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a')
+
+class VideoSource:
+    def __init__(self, path):
+        """Open a video file for metadata through PyAV's libav bindings
+        
+        Args:
+            path: Path to the video file
+        """
+        self.path = path
+        self.container = None
+        self.stream = None
+        self.duration = None  # Without PyAV the duration comes from QMediaPlayer instead
+        
+        if PYAV_AVAILABLE:
+            self.container = av.open(path)
+            try:
+                self.stream = self.container.streams.video[0]
+            except IndexError:
+                # No video stream; don't leave the container open
+                self.close()
+                raise
+            self.time_base = self.stream.time_base
+            # Some containers only store the duration at container level (in microseconds), and
+            # live or raw streams store none, leaving it to QMediaPlayer
+            if self.stream.duration is not None:
+                self.duration = float(self.stream.duration * self.time_base)
+            elif self.container.duration is not None:
+                self.duration = self.container.duration / av.time_base
+    
+    def close(self):
+        """Release the underlying container"""
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+class VideoSourceLoader(QThread):
+    """Worker thread that opens a VideoSource so probing the file doesn't block the UI"""
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            self.loaded.emit(VideoSource(self.path))
+        except Exception as e:
+            self.failed.emit(str(e))
+
 class MediaPlayerController:
     def __init__(self, parent):
         """Initialize media player functionality
@@ -17,10 +72,13 @@ class MediaPlayerController:
         self.parent = parent
         self.video_file_path = None
         self.audio_path = None
-        self.video_clip = None
+        self.video_source = None
+        self.source_loaders = []  # Loader threads still running, kept alive until they finish
         self.current_time = 0
         self.is_playing = False
         self.is_audio_only = False
+        self._last_slider_ms = -1  # Last position written to the timeline slider
+        self._last_label_sec = -1  # Last whole second shown in the time label
         
         # Initialize media player component
         self.setup_media_player()
@@ -33,10 +91,21 @@ class MediaPlayerController:
         # Create the media player that will handle the video playback
         self.parent.media_player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
         self.parent.media_player.setVideoOutput(self.parent.video_widget)
+        self.parent.media_player.setNotifyInterval(50)  # positionChanged granularity, used to end previews
         
         # Create timer to update playback position
         self.parent.update_timer = QTimer(self.parent)
         self.parent.update_timer.setInterval(100)  # Update every 100 milliseconds
+        
+        # Slider drags fire on every pixel; apply at most one seek/volume change per interval
+        self.pending_seek = None
+        self.seek_timer = QTimer(self.parent)
+        self.seek_timer.setSingleShot(True)
+        self.seek_timer.setInterval(SLIDER_DEBOUNCE_MS)
+        self.pending_volume = None
+        self.volume_timer = QTimer(self.parent)
+        self.volume_timer.setSingleShot(True)
+        self.volume_timer.setInterval(SLIDER_DEBOUNCE_MS)
     
     def connect_signals(self):
         """Connect media player signals"""
@@ -45,12 +114,14 @@ class MediaPlayerController:
         self.parent.media_player.durationChanged.connect(self.duration_changed)
         self.parent.media_player.error.connect(self.handle_error)
         self.parent.update_timer.timeout.connect(self.update_playback_position)
+        self.seek_timer.timeout.connect(self.apply_pending_seek)
+        self.volume_timer.timeout.connect(self.apply_pending_volume)
         
         # Connect UI controls to functions
         self.parent.load_button.clicked.connect(self.load_media)
         self.parent.play_button.clicked.connect(self.toggle_play)
-        self.parent.timeline_slider.sliderMoved.connect(self.seek_position)
-        self.parent.volume_slider.valueChanged.connect(self.change_volume)
+        self.parent.timeline_slider.sliderMoved.connect(self.queue_seek)
+        self.parent.volume_slider.valueChanged.connect(self.queue_volume)
     
     def load_media(self):
         """Load a video or audio file"""
@@ -68,25 +139,30 @@ class MediaPlayerController:
             self.parent.audio_path = filepath
 
             # Determine if it's audio or video based on file extension
-            audio_extensions = ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a']
-            ext = os.path.splitext(filepath)[1].lower()
+            is_audio = filepath.lower().endswith(AUDIO_EXTENSIONS)
+
+            # Release the previously loaded video before opening the new one
+            if self.video_source is not None:
+                self.video_source.close()
+                self.video_source = None
+                self.parent.video_source = None
 
             try:
                 # Always set the media content
                 self.parent.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(filepath)))
                 
-                if ext in audio_extensions:
+                if is_audio:
                     # Load audio file
                     self.is_audio_only = True
                     self.parent.is_audio_only = True
-                    self.video_clip = None
-                    self.parent.video_clip = None
+                    self.video_source = None
+                    self.parent.video_source = None
                 else:
                     # Load video file
                     self.is_audio_only = False
                     self.parent.is_audio_only = False
-                    self.video_clip = VideoFileClip(filepath)
-                    self.parent.video_clip = self.video_clip
+                    # QMediaPlayer can already play the file; open it for metadata in the background
+                    self.start_video_source_loader(filepath)
                 
                 # Make sure video elements have proper size
                 self.parent.video_widget.setMinimumHeight(360)
@@ -108,6 +184,36 @@ class MediaPlayerController:
                 QMessageBox.critical(self.parent, "Load Error", f"Failed to load media: {str(e)}")
                 return
     
+    def start_video_source_loader(self, path):
+        """Open the VideoSource for path on a worker thread"""
+        loader = VideoSourceLoader(path)
+        loader.loaded.connect(self.handle_video_source_loaded)
+        loader.failed.connect(self.handle_video_source_failed)
+        loader.finished.connect(lambda: self.source_loaders.remove(loader))
+        self.source_loaders.append(loader)
+        loader.start()
+    
+    def handle_video_source_loaded(self, source):
+        """Use the opened VideoSource unless another file was loaded in the meantime"""
+        if source.path != self.video_file_path:
+            source.close()
+            return
+        if self.video_source is not None:
+            # The same file was loaded twice; keep only the newest container open
+            self.video_source.close()
+        self.video_source = source
+        self.parent.video_source = source
+    
+    def handle_video_source_failed(self, error_message):
+        """Report a file that QMediaPlayer accepted but couldn't be opened for clipping"""
+        QMessageBox.critical(self.parent, "Load Error", f"Failed to read video details: {error_message}")
+    
+    def media_duration(self):
+        """Return the duration in seconds, from QMediaPlayer when the VideoSource can't provide it"""
+        if self.video_source is not None and self.video_source.duration is not None:
+            return self.video_source.duration
+        return self.parent.media_player.duration() / 1000
+    
     def toggle_play(self):
         """Toggle between play and pause"""
         if self.parent.media_player.state() == QMediaPlayer.PlayingState:
@@ -133,29 +239,67 @@ class MediaPlayerController:
         duration_sec = duration / 1000  # Convert milliseconds to seconds
         self.parent.timeline_slider.setRange(0, duration)  # Set the slider range
         self.parent.time_label.setText(f"00:00:00 / {format_time(duration_sec)}")
+        self._last_label_sec = -1  # The label was reset, so the next tick must rewrite it
     
     def update_playback_position(self):
         """Update the playback position display while video is playing"""
         if self.is_playing:
             position = self.parent.media_player.position()  # Get current position in ms
-            # Update the slider without triggering signals
-            self.parent.timeline_slider.blockSignals(True)
-            self.parent.timeline_slider.setValue(position)
-            self.parent.timeline_slider.blockSignals(False)
+            # Update the slider without triggering signals, only when the position moved
+            if position != self._last_slider_ms:
+                self.parent.timeline_slider.blockSignals(True)
+                self.parent.timeline_slider.setValue(position)
+                self.parent.timeline_slider.blockSignals(False)
+                self._last_slider_ms = position
             current_sec = position / 1000  # Convert to seconds
-            duration_sec = self.parent.media_player.duration() / 1000
-            # Update the time display
-            self.parent.time_label.setText(f"{format_time(current_sec)} / {format_time(duration_sec)}")
+            # Update the time display only when the shown second changes
+            if position // 1000 != self._last_label_sec:
+                self.parent.time_label.setText(self.position_label_text(current_sec))
+                self._last_label_sec = position // 1000
             self.current_time = current_sec
             self.parent.current_time = current_sec
     
+    def position_label_text(self, current_sec):
+        """Time label text for a playback position, naming the highlight playing there if any"""
+        duration_sec = self.parent.media_player.duration() / 1000
+        text = f"{format_time(current_sec)} / {format_time(duration_sec)}"
+        playing = self.parent.highlight_manager.playing_highlight_index(current_sec)
+        if playing >= 0:
+            text += f"  (highlight #{playing + 1})"
+        return text
+    
+    def queue_seek(self, position):
+        """Remember the latest slider position and seek to it on the next debounce tick"""
+        self.pending_seek = position
+        if not self.seek_timer.isActive():
+            self.seek_timer.start()
+
+    def apply_pending_seek(self):
+        """Seek to the most recent slider position"""
+        if self.pending_seek is not None:
+            self.seek_position(self.pending_seek)
+            self.pending_seek = None
+
+    def queue_volume(self, value):
+        """Remember the latest volume and apply it on the next debounce tick"""
+        self.pending_volume = value
+        if not self.volume_timer.isActive():
+            self.volume_timer.start()
+
+    def apply_pending_volume(self):
+        """Apply the most recent volume slider value"""
+        if self.pending_volume is not None:
+            self.change_volume(self.pending_volume)
+            self.pending_volume = None
+
     def seek_position(self, position):
         """Jump to a position in the video when slider is moved"""
         self.parent.media_player.setPosition(position)
         self.current_time = position / 1000
         self.parent.current_time = self.current_time
-        duration_sec = self.parent.media_player.duration() / 1000
-        self.parent.time_label.setText(f"{format_time(self.current_time)} / {format_time(duration_sec)}")
+        self.parent.time_label.setText(self.position_label_text(self.current_time))
+        self._last_slider_ms = position
+        self._last_label_sec = position // 1000
     
     def change_volume(self, value):
         """Adjust volume when slider is moved"""
@@ -0,0 +1,82 @@
+# On-disk cache of transcription results so unchanged media isn't transcribed twice
+
+import os
+import json
+import hashlib
+from config import CACHE_DIR
+
+TRANSCRIPT_CACHE_DIR = os.path.join(CACHE_DIR, "transcripts")
+CACHE_FORMAT_VERSION = 1
+
+def transcript_cache_key(audio_path, model_name):
+    """Build a cache key from the first MiB of the file, its size and the speech model used"""
+    digest = hashlib.sha1()
+    with open(audio_path, 'rb') as f:
+        digest.update(f.read(1 << 20))
+    digest.update(str(os.path.getsize(audio_path)).encode())
+    digest.update(model_name.encode())
+    return digest.hexdigest()
+
+def _cache_path(key):
+    return os.path.join(TRANSCRIPT_CACHE_DIR, f"{key}.json")
+
+def load_cached_transcript(audio_path, model_name):
+    """Return (highlights, full_text) from an earlier run on the same media, or None"""
+    try:
+        with open(_cache_path(transcript_cache_key(audio_path, model_name)), encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        # JSON turns the highlight tuples into lists
+        return [tuple(h) for h in data["highlights"]], data["full_text"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Transcript cache read error: {e}")
+        return None
+
+def save_cached_transcript(audio_path, model_name, highlights, full_text):
+    """Store the highlights and transcript text for this media file"""
+    try:
+        os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+        path = _cache_path(transcript_cache_key(audio_path, model_name))
+        # Write to a temp file first so an interrupted save never leaves a truncated cache entry
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_FORMAT_VERSION, "highlights": highlights, "full_text": full_text}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Transcript cache write error: {e}")
+
+# Which checkpoint actually loaded for each preferred one, so results saved after a fallback
+# are found again before the model is loaded in a later session
+LOADED_MODELS_PATH = os.path.join(TRANSCRIPT_CACHE_DIR, "loaded_models.json")
+
+def _read_loaded_models():
+    try:
+        with open(LOADED_MODELS_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Loaded model record read error: {e}")
+        return {}
+
+def remembered_model_name(preferred_name):
+    """Return the model name that loaded last time preferred_name was requested, or None"""
+    return _read_loaded_models().get(preferred_name)
+
+def remember_model_name(preferred_name, loaded_name):
+    """Record that requesting preferred_name loaded loaded_name (the same name unless it fell back)"""
+    loaded_models = _read_loaded_models()
+    if loaded_models.get(preferred_name) == loaded_name:
+        return
+    loaded_models[preferred_name] = loaded_name
+    try:
+        os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+        tmp_path = LOADED_MODELS_PATH + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(loaded_models, f)
+        os.replace(tmp_path, LOADED_MODELS_PATH)
+    except OSError as e:
+        print(f"Loaded model record write error: {e}")
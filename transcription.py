@@ -1,25 +1,239 @@
 # Transcription functionality using Whisper model
 
-import time
+import os
 import queue
+import hashlib
 import threading
 import gc
+from collections import OrderedDict
+import numpy as np
+import torch
 from PyQt5.QtCore import QThread, pyqtSignal
 from transformers import pipeline
 from config import (
-    PYDUB_AVAILABLE, HIGHLIGHT_EMOTIONS, HIGHLIGHT_TIMING,
+    HIGHLIGHT_EMOTIONS, HIGHLIGHT_TIMING,
     HIGHLIGHT_WINDOW_SECONDS, HIGHLIGHT_MIN_SPIKES, HIGHLIGHT_MIN_CLIP_LENGTH,
     HIGHLIGHT_MAX_CLIP_LENGTH, HIGHLIGHT_MIN_EMOTION_INTENSITY,
-    HIGHLIGHT_REQUIRED_EMOTION_VARIETY
+    HIGHLIGHT_REQUIRED_EMOTION_VARIETY, WHISPER_BATCH_SIZE,
+    CACHE_DIR, AUDIO_MEMORY_CACHE_SIZE, WHISPER_BEAM_SIZE, USE_VAD, VAD_MIN_SILENCE_MS,
+    LIVE_TEXT_QUEUE_SIZE, CLASSIFIER_INT8, CLASSIFIER_CACHE_SIZE, NUMBA_AVAILABLE, TORCH_CPU_THREADS
 )
+from utils import cuda_supports_fp16, is_faster_whisper_model, whisper_inference_context, get_resource_limits
 
 # Load the emotion classification model
-classifier = pipeline("text-classification", model="bhadresh-savani/distilbert-base-uncased-emotion", top_k=2)
+classifier = pipeline("text-classification", model="bhadresh-savani/distilbert-base-uncased-emotion", top_k=1)
+
+# The classifier runs on the CPU, where int8 matmuls are roughly twice as fast as float32
+# for DistilBERT with a negligible change in scores
+if CLASSIFIER_INT8:
+    try:
+        classifier.model = torch.quantization.quantize_dynamic(classifier.model, {torch.nn.Linear}, dtype=torch.qint8)
+    except Exception as e:
+        print(f"Could not quantize the emotion classifier, using float32: {e}")
+
+# Classifier output for recently seen texts; repeated phrases and re-runs skip the forward pass
+_prediction_cache = OrderedDict()
+_prediction_cache_lock = threading.Lock()
+
+# Recently decoded waveforms, keyed by (path, mtime, size) so edited files are decoded again
+_audio_cache = OrderedDict()
+_audio_cache_lock = threading.Lock()
+
+def load_audio_cached(path):
+    """Decode a media file to 16 kHz mono float32 audio, reusing earlier decodes of the same file"""
+    key = (os.path.abspath(path), os.path.getmtime(path), os.path.getsize(path))
+    with _audio_cache_lock:
+        if key in _audio_cache:
+            _audio_cache.move_to_end(key)
+            return _audio_cache[key]
+    
+    # Decodes from earlier sessions are kept on disk as float16 to halve their size
+    cache_file = os.path.join(CACHE_DIR, hashlib.sha1(repr(key).encode()).hexdigest() + ".f16.npy")
+    audio = None
+    if os.path.exists(cache_file):
+        try:
+            audio = np.load(cache_file, mmap_mode="r").astype(np.float32)
+        except Exception as e:
+            print(f"Audio cache read error: {e}")
+    
+    if audio is None:
+        import whisper
+        audio = whisper.load_audio(path)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            np.save(cache_file, audio.astype(np.float16))
+        except OSError as e:
+            print(f"Audio cache write error: {e}")
+    
+    with _audio_cache_lock:
+        _audio_cache[key] = audio
+        while len(_audio_cache) > AUDIO_MEMORY_CACHE_SIZE:
+            _audio_cache.popitem(last=False)
+    return audio
+
+# Integer ids for the emotions that can produce highlights, assigned once. Ids follow name
+# order so sorting by id ranks highlights the same way sorting the labels does
+_EMOTION_NAMES = sorted(HIGHLIGHT_EMOTIONS)
+_EMOTION_IDS = {name: i for i, name in enumerate(_EMOTION_NAMES)}
+
+def _overlaps_existing(clip_start, clip_end, clips, first, clip_count, overlap_threshold):
+    """Check if a clip overlaps substantially with any of rows first..clip_count-1 of clips"""
+    for c in range(first, clip_count):
+        existing_start, existing_end = clips[c, 2], clips[c, 3]
+        
+        # Find overlap
+        overlap_start = max(clip_start, existing_start)
+        overlap_end = min(clip_end, existing_end)
+        
+        if overlap_end > overlap_start:  # There is an overlap
+            overlap_duration = overlap_end - overlap_start
+            
+            # If overlap is more than threshold of either clip's duration
+            if (overlap_duration / (clip_end - clip_start) > overlap_threshold or
+                    overlap_duration / (existing_end - existing_start) > overlap_threshold):
+                return True
+    return False
+
+def _scan_spike_windows(starts, ends, emotion_ids, n_emotions, window_seconds, min_spikes,
+                        min_variety, min_length, max_length, overlap_threshold):
+    """Find the windows of emotional spikes that become multi-spike highlights
+    
+    Pure numeric loops over sorted column arrays, so Numba can compile it when installed.
+    
+    Args:
+        starts: Sorted float64 highlight start times
+        ends: float64 highlight end times, in the same order
+        emotion_ids: Integer emotion id of each highlight
+        n_emotions: Number of distinct emotion ids
+        window_seconds: Length of the window that starts at each highlight
+        min_spikes: Fewest highlights a window needs
+        min_variety: Fewest distinct emotions a window needs
+        min_length: Shortest clip length in seconds
+        max_length: Longest clip length in seconds
+        overlap_threshold: Largest fraction of either clip two accepted clips may share
+    
+    Returns:
+        float64 array with one (lo, hi, clip_start, clip_end) row per accepted window,
+        where [lo, hi) is the index range of the highlights in it
+    """
+    n = starts.shape[0]
+    # Every window [start, start + window_seconds] as a [lo, hi) index range
+    window_los = np.searchsorted(starts, starts, side='left')
+    window_his = np.searchsorted(starts, starts + window_seconds, side='right')
+    
+    clips = np.empty((n, 4), dtype=np.float64)
+    clip_count = 0
+    # Accepted clips are found in start order and none is longer than max_span, so only clips
+    # starting within max_span (plus a second of slack for rounding) of a new clip can overlap it
+    max_span = max(max_length, min_length) + 1.0
+    processed = np.zeros(n, dtype=np.bool_)
+    
+    # Both window edges only move forward, so the emotion histogram of the current window
+    # [cur_lo, cur_hi) and its variety are updated as highlights enter and leave it
+    counts = np.zeros(n_emotions, dtype=np.int64)
+    variety = 0
+    cur_lo = 0
+    cur_hi = 0
+    
+    # change_counts[k]: how many neighbours up to k differ in emotion, so the intensity
+    # check for any window is one subtraction instead of a scan over it
+    change_counts = np.zeros(n, dtype=np.int64)
+    for k in range(1, n):
+        change_counts[k] = change_counts[k - 1] + (emotion_ids[k] != emotion_ids[k - 1])
+    
+    for i in range(n - min_spikes + 1):
+        # Skip if this highlight already belongs to an accepted window
+        if processed[i]:
+            continue
+        lo, hi = window_los[i], window_his[i]
+        if hi - lo < min_spikes:
+            continue
+        
+        # Slide the histogram to this window
+        while cur_hi < hi:
+            counts[emotion_ids[cur_hi]] += 1
+            if counts[emotion_ids[cur_hi]] == 1:
+                variety += 1
+            cur_hi += 1
+        while cur_lo < lo:
+            counts[emotion_ids[cur_lo]] -= 1
+            if counts[emotion_ids[cur_lo]] == 0:
+                variety -= 1
+            cur_lo += 1
+        
+        # Emotion variety
+        if variety < min_variety:
+            continue
+        
+        # Emotional intensity: consecutive highlights with different emotions
+        if change_counts[hi - 1] - change_counts[lo] == 0:
+            continue
+        
+        # Span the window, clamped to the clip length limits
+        clip_start = starts[i]
+        clip_end = min(ends[lo:hi].max(), clip_start + max_length)
+        clip_end = max(clip_end, clip_start + min_length)
+        
+        first = np.searchsorted(clips[:clip_count, 2], clip_start - max_span, side='right')
+        if _overlaps_existing(clip_start, clip_end, clips, first, clip_count, overlap_threshold):
+            continue
+        clips[clip_count, 0] = lo
+        clips[clip_count, 1] = hi
+        clips[clip_count, 2] = clip_start
+        clips[clip_count, 3] = clip_end
+        clip_count += 1
+        processed[lo:hi] = True
+    
+    return clips[:clip_count]
+
+if NUMBA_AVAILABLE:
+    from numba import njit
+    _overlaps_existing = njit(cache=True)(_overlaps_existing)
+    _scan_spike_windows = njit(cache=True)(_scan_spike_windows)
+
+def detect_silence_regions(audio, sample_rate=16000, min_silence_ms=500, silence_thresh_db=-40, hop_ms=10):
+    """Find stretches of audio quieter than silence_thresh_db for at least min_silence_ms
+    
+    Same rule as pydub's detect_silence (windows of min_silence_ms whose RMS is below the
+    threshold in dBFS, merged into regions), evaluated every hop_ms on the decoded waveform.
+    
+    Args:
+        audio: Mono float32 waveform in [-1, 1]
+        sample_rate: Samples per second of audio
+        min_silence_ms: Shortest silence to report
+        silence_thresh_db: Loudness in dBFS below which audio counts as silent
+        hop_ms: Step between the windows that are checked
+    
+    Returns:
+        List of (start, end) silence regions in seconds, sorted and non-overlapping
+    """
+    hop = sample_rate * hop_ms // 1000
+    frames_per_window = max(1, min_silence_ms // hop_ms)
+    n_frames = len(audio) // hop
+    if n_frames < frames_per_window:
+        return []
+    
+    # Energy per hop, then per window as a difference of running sums (einsum avoids a squared copy)
+    frames = np.asarray(audio[:n_frames * hop], dtype=np.float32).reshape(n_frames, hop)
+    frame_energy = np.einsum('ij,ij->i', frames, frames, dtype=np.float64)
+    running = np.concatenate(([0.0], np.cumsum(frame_energy)))
+    window_energy = running[frames_per_window:] - running[:-frames_per_window]
+    
+    # RMS below the threshold, compared as energy so no log or sqrt is needed per window
+    window_samples = frames_per_window * hop
+    threshold_energy = window_samples * 10 ** (silence_thresh_db / 10)
+    silent = window_energy < threshold_energy
+    
+    # Runs of silent windows become regions from the first window's start to the last window's end
+    edges = np.diff(np.concatenate(([0], silent.view(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1) - 1 + frames_per_window
+    hop_seconds = hop / sample_rate
+    return [(float(a * hop_seconds), float(b * hop_seconds)) for a, b in zip(run_starts, run_ends)]
 
 class TranscriptionWorker(QThread):
     """Worker thread for transcription and highlight detection"""
     progress = pyqtSignal(int)
-    live_update = pyqtSignal(str)
     finished = pyqtSignal(list)
     partial_results = pyqtSignal(list)  # Add this signal for compatibility with GUI
 
@@ -28,58 +242,72 @@ class TranscriptionWorker(QThread):
         self.model = model
         self.audio_path = audio_path
         
-        # Default batch and worker settings if psutil not available
-        self.batch_size = 10
-        self.max_workers = 2
+        # Transcript messages for the UI. Bounded, so a UI that falls behind slows the worker down
+        # instead of piling up queued signals
+        self.text_queue = queue.Queue(maxsize=LIVE_TEXT_QUEUE_SIZE)
         
-        # Try to use psutil for adaptive resource management if available
-        if 'PSUTIL_AVAILABLE' in globals() and PSUTIL_AVAILABLE:
+        # Set when a run classified every segment without being cancelled; only complete
+        # runs are worth caching
+        self.completed = False
+        
+        # Classifier batch size for this machine (the default when psutil is not installed)
+        self.batch_size, _ = get_resource_limits("emotion")
+
+    def post_text(self, text):
+        """Hand a transcript message to the UI, waiting while the queue is full"""
+        while not self.isInterruptionRequested():
             try:
-                # Adaptive batch sizing based on system resources
-                cpu_cores = psutil.cpu_count(logical=False) or 2
-                mem_available_gb = psutil.virtual_memory().available / (1024 * 1024 * 1024)
-                
-                # Adjust batch size based on available resources
-                if mem_available_gb > 8 and cpu_cores >= 4:
-                    self.batch_size = 20
-                elif mem_available_gb > 4 and cpu_cores >= 2:
-                    self.batch_size = 10
-                else:
-                    self.batch_size = 5
-                
-                self.max_workers = max(1, min(cpu_cores - 1, 4))  # Leave one core free
-            except Exception:
-                # Fall back to defaults if there's an error
-                pass
-                
-        self.use_threading = True  # Enable parallel processing
+                self.text_queue.put(text, timeout=1.0)
+                return
+            except queue.Full:
+                continue
 
     def run(self):
-        # Get full transcription in one go
-        result = self.model.transcribe(
-            self.audio_path,
-            fp16=False,  # Use fp32 for CPU
-            language="en",  # Specify language if known
-        )
+        # Skip the ffmpeg decode if this file was transcribed before
+        audio = load_audio_cached(self.audio_path)
         
-        segments = result['segments']
-        total_segments = len(segments)
+        if is_faster_whisper_model(self.model):
+            # CTranslate2 model (batched pipeline on GPU, int8 on CPU)
+            segments = self._transcribe_faster_whisper(audio)
+        elif self.model.device.type == "cuda":
+            # Decode several 30 second windows per forward pass, in half precision on GPUs with tensor cores
+            use_fp16 = cuda_supports_fp16()
+            with whisper_inference_context("cuda", use_fp16):
+                segments = self._transcribe_batched(audio, use_fp16)
+        else:
+            # One intra-op thread per physical core; torch's default can oversubscribe hyperthreads
+            if torch.get_num_threads() != TORCH_CPU_THREADS:
+                torch.set_num_threads(TORCH_CPU_THREADS)
+            
+            # Get full transcription in one go (inference mode, no autograd bookkeeping)
+            with whisper_inference_context("cpu", False):
+                result = self.model.transcribe(
+                    audio,
+                    fp16=False,
+                    language="en",  # Specify language if known
+                )
+            segments = result['segments']
         
-        # Try to detect silence for better segmentation
+        # Cancelled while decoding: skip the analysis and hand back no highlights
+        if self.isInterruptionRequested():
+            self.finished.emit([])
+            return
+        
+        # Try to detect silence for better segmentation, on the waveform already decoded for whisper
         silence_timestamps = []
-        if PYDUB_AVAILABLE:
-            try:
-                from pydub import AudioSegment
-                from pydub.silence import detect_silence
-                
-                sound = AudioSegment.from_file(self.audio_path)
-                silence_regions = detect_silence(sound, min_silence_len=500, silence_thresh=-40)
-                
-                # Convert silence regions to timestamps (ms → seconds)
-                silence_timestamps = [(start/1000, end/1000) for start, end in silence_regions]
-                self.live_update.emit("Located natural breaks in audio for better processing")
-            except Exception as e:
-                print(f"Silence detection error: {e}")
+        try:
+            silence_timestamps = detect_silence_regions(audio)
+            self.post_text("Located natural breaks in audio for better processing")
+        except Exception as e:
+            print(f"Silence detection error: {e}")
+        if self.isInterruptionRequested():
+            self.finished.emit([])
+            return
+        
+        # Silence regions come back sorted and non-overlapping, so both their starts and their
+        # ends are sorted and the regions inside a segment can be found by binary search
+        silence_starts = np.array([s_start for s_start, _ in silence_timestamps], dtype=np.float64)
+        silence_ends = np.array([s_end for _, s_end in silence_timestamps], dtype=np.float64)
         
         # Pre-process segments into smaller, uniform chunks
         processed_segments = []
@@ -90,11 +318,11 @@ class TranscriptionWorker(QThread):
             
             # Use silence detection for more natural segment breaks if available
             if silence_timestamps:
-                # Find silence regions within this segment
-                segment_silences = [
-                    (s_start, s_end) for s_start, s_end in silence_timestamps 
-                    if s_start >= start and s_end <= end
-                ]
+                # Find silence regions within this segment: [lo, hi) start at or after the
+                # segment start and end at or before the segment end
+                lo = np.searchsorted(silence_starts, start, side='left')
+                hi = np.searchsorted(silence_ends, end, side='right')
+                segment_silences = silence_timestamps[lo:hi]
                 
                 if segment_silences:
                     # Use silence points as natural breaking points
@@ -107,153 +335,207 @@ class TranscriptionWorker(QThread):
                         processed_segments.append((last_point, text))
                     continue
             
-            # Fall back to time-based chunking if no silences found
-            if end - start > 10:
-                slice_size = 10  # seconds
-                num_slices = int((end - start) // slice_size) + 1
-                for slice_idx in range(num_slices):
-                    slice_start = start + slice_idx * slice_size
-                    slice_end = min(slice_start + slice_size, end)
-                    processed_segments.append((slice_start, text))
-            else:
-                processed_segments.append((start, text))
-        
-        # Process in batches using a work queue
-        work_queue = queue.Queue()
-        result_queue = queue.Queue()
-        individual_highlights = []
+            # Otherwise classify the segment once at its own start time. Whisper already splits
+            # speech into timed segments, and 10 second time slices would only repeat the same text
+            processed_segments.append((start, text))
+        
+        # Each distinct text is classified once; texts seen before reuse the cached prediction
+        texts = [text for _, text in processed_segments]
+        predictions_by_text = {}
+        with _prediction_cache_lock:
+            for text in texts:
+                if text in _prediction_cache:
+                    _prediction_cache.move_to_end(text)
+                    predictions_by_text[text] = _prediction_cache[text]
+        uncached_texts = [text for text in dict.fromkeys(texts) if text not in predictions_by_text]
         
-        # Fill queue with work
-        for segment in processed_segments:
-            work_queue.put(segment)
-        
-        # Worker function for thread pool
-        def worker():
-            while True:
-                try:
-                    segment = work_queue.get(timeout=1)
-                    if segment is None:  # Sentinel to signal end
-                        break
-                    result = self._process_segment(segment)
-                    if result:
-                        result_queue.put(result)
-                    work_queue.task_done()
-                except queue.Empty:
-                    break
-                except Exception as e:
-                    print(f"Worker error: {e}")
-                    work_queue.task_done()
-        
-        # Add sentinels to stop workers
-        for _ in range(self.max_workers):
-            work_queue.put(None)
-        
-        # Create progress tracking variables
+        individual_highlights = []
         total_items = len(processed_segments)
-        completed_items = 0
-        
-        # Start workers if using threading
-        if self.use_threading:
-            threads = []
-            for _ in range(self.max_workers):
-                t = threading.Thread(target=worker)
-                t.daemon = True
-                t.start()
-                threads.append(t)
-            
-            # Monitor progress while workers are running
-            last_update_time = time.time()
-            update_interval = 0.5  # seconds
-            
-            while any(t.is_alive() for t in threads):
-                # Calculate approximate progress
-                current_size = work_queue.qsize()
-                if total_items > 0:
-                    completed = total_items - current_size
-                    percent_complete = min(100, int((completed / total_items) * 100))
-                    
-                    # Update progress bar periodically
-                    current_time = time.time()
-                    if current_time - last_update_time > update_interval:
-                        self.progress.emit(percent_complete)
-                        last_update_time = current_time
-                
-                # Process any available results
-                highlights_batch = []
-                while not result_queue.empty():
-                    highlights_batch.append(result_queue.get())
-                
-                # Send batch updates
-                if highlights_batch:
-                    highlights_text = "\n".join(f"Potential highlight found: {h[2]}" for h in highlights_batch)
-                    self.live_update.emit(highlights_text)
-                    individual_highlights.extend(highlights_batch)
-                
-                # Sleep briefly to prevent high CPU usage in this loop
-                time.sleep(0.1)
-                
-                # Periodically force garbage collection
-                if int(current_time) % 5 == 0:
-                    gc.collect()
-            
-            # Wait for all threads to complete
-            for t in threads:
-                t.join()
-        else:
-            # Sequential processing fallback
-            for i, segment in enumerate(processed_segments):
-                result = self._process_segment(segment)
+        next_segment = 0
+        
+        def flush_ready_segments():
+            """Turn segments whose text has a prediction into highlights, in transcript order"""
+            nonlocal next_segment
+            highlights_batch = []
+            while next_segment < total_items and texts[next_segment] in predictions_by_text:
+                segment = processed_segments[next_segment]
+                result = self._process_segment(segment, predictions_by_text[segment[1]])
                 if result:
-                    individual_highlights.append(result)
-                    self.live_update.emit(f"Highlight found: {result[2]}")
-                
-                # Update progress every few items
-                if i % 5 == 0:
-                    percent_complete = min(100, int((i / total_items) * 100))
-                    self.progress.emit(percent_complete)
+                    highlights_batch.append(result)
+                next_segment += 1
+            
+            # Send batch updates
+            if highlights_batch:
+                highlights_text = "\n".join(f"Potential highlight found: {h[2]}" for h in highlights_batch)
+                self.post_text(highlights_text)
+                individual_highlights.extend(highlights_batch)
+            if total_items:
+                self.progress.emit(min(100, int(next_segment / total_items * 100)))
         
-        # Get any remaining results from the queue
-        while not result_queue.empty():
-            individual_highlights.append(result_queue.get())
+        flush_ready_segments()
+        
+        # Classify the remaining texts with one pipeline call per batch. Given the whole list, the
+        # pipeline only returns once every text is classified, so highlights, progress and Cancel
+        # would all wait for the end of the transcript
+        classification_failed = False
+        if uncached_texts:
+            try:
+                with torch.inference_mode():
+                    for batch_start in range(0, len(uncached_texts), self.batch_size):
+                        if self.isInterruptionRequested():
+                            break
+                        batch_texts = uncached_texts[batch_start:batch_start + self.batch_size]
+                        predictions = classifier(batch_texts, batch_size=self.batch_size, truncation=True)
+                        # Cache each batch as soon as it is classified, so a cancelled run still
+                        # keeps what it finished, taking the lock once per batch rather than per text
+                        batch_predictions = dict(zip(batch_texts, predictions))
+                        predictions_by_text.update(batch_predictions)
+                        with _prediction_cache_lock:
+                            _prediction_cache.update(batch_predictions)
+                            while len(_prediction_cache) > CLASSIFIER_CACHE_SIZE:
+                                _prediction_cache.popitem(last=False)
+                        
+                        # Report after every batch of texts
+                        flush_ready_segments()
+            except Exception as e:
+                print(f"Emotion classification error: {e}")
+                classification_failed = True
+            flush_ready_segments()
         
         # Process detected individual highlights into multi-spike highlights
-        self.live_update.emit(f"Analyzing emotional patterns for high-quality highlights...")
-        self.live_update.emit(f"Found {len(individual_highlights)} individual emotional moments, looking for patterns...")
+        self.post_text("Analyzing emotional patterns for high-quality highlights...")
+        self.post_text(f"Found {len(individual_highlights)} individual emotional moments, looking for patterns...")
         final_highlights = self._find_multi_spike_highlights(individual_highlights)
         
         # Final progress update
         self.progress.emit(100)
+        self.completed = not classification_failed and not self.isInterruptionRequested()
+        self.finished.emit(final_highlights)
         
-        # Force garbage collection before finishing
+        # Free this run's temporaries once the results are on their way to the UI
         gc.collect()
-        
-        self.finished.emit(final_highlights)
 
-    def _process_segment(self, segment_data):
-        """Process a single segment and return highlight if found"""
+    def _transcribe_faster_whisper(self, audio):
+        """Transcribe with a faster-whisper model or batched pipeline, returning whisper-style segments"""
+        options = {}
+        if type(self.model).__name__ == "BatchedInferencePipeline":
+            options["batch_size"] = WHISPER_BATCH_SIZE
+        if USE_VAD:
+            # Silence, music and other non-speech regions never reach the encoder
+            options["vad_parameters"] = dict(min_silence_duration_ms=VAD_MIN_SILENCE_MS)
+        fw_segments, info = self.model.transcribe(
+            audio, language="en", beam_size=WHISPER_BEAM_SIZE, vad_filter=USE_VAD, **options
+        )
+        
+        # The generator decodes lazily, so the transcription happens while iterating
+        segments = []
+        for seg in fw_segments:
+            # Stop decoding the rest of the file once cancelled
+            if self.isInterruptionRequested():
+                break
+            segments.append({'start': seg.start, 'end': seg.end, 'text': seg.text})
+            # Show each segment as soon as it is decoded instead of after the whole file
+            self.post_text(seg.text.strip())
+            if info.duration > 0:
+                self.progress.emit(min(100, int(seg.end / info.duration * 100)))
+        return segments
+    
+    def _transcribe_batched(self, audio, use_fp16):
+        """Transcribe the audio as batches of 30 second windows, returning whisper-style segments"""
+        import whisper
+        from whisper.audio import N_SAMPLES, N_FRAMES, HOP_LENGTH, SAMPLE_RATE
+        from whisper.tokenizer import get_tokenizer
+        
+        model = self.model
+        
+        # Same tokenizer and timestamp resolution whisper uses internally
+        tokenizer_kwargs = {"num_languages": model.num_languages} if hasattr(model, "num_languages") else {}
+        tokenizer = get_tokenizer(model.is_multilingual, language="en", task="transcribe", **tokenizer_kwargs)
+        time_precision = (N_FRAMES // model.dims.n_audio_ctx) * HOP_LENGTH / SAMPLE_RATE
+        options = whisper.DecodingOptions(language="en", fp16=use_fp16, without_timestamps=False)
+        
+        # Upload the waveform once so the STFT and mel filterbank run on the GPU instead of the CPU
+        audio_gpu = torch.from_numpy(np.ascontiguousarray(audio)).to(model.device)
+        
+        offsets = list(range(0, len(audio), N_SAMPLES))
+        segments = []
+        for batch_start in range(0, len(offsets), WHISPER_BATCH_SIZE):
+            # Stop decoding the rest of the file once cancelled
+            if self.isInterruptionRequested():
+                break
+            batch_offsets = offsets[batch_start:batch_start + WHISPER_BATCH_SIZE]
+            # One spectrogram per window: whisper normalizes each against its own peak
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audio_gpu[offset:offset + N_SAMPLES]), model.dims.n_mels)
+                for offset in batch_offsets
+            ])
+            
+            for offset, result in zip(batch_offsets, whisper.decode(model, mels, options)):
+                # Skip windows whisper considers silent, using the thresholds from whisper.transcribe
+                if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                    continue
+                window_start = offset / SAMPLE_RATE
+                window_end = min(offset + N_SAMPLES, len(audio)) / SAMPLE_RATE
+                window_segments = self._tokens_to_segments(
+                    result.tokens, tokenizer, window_start, window_end, time_precision)
+                segments.extend(window_segments)
+                # Show each window's text as soon as its batch is decoded
+                for segment in window_segments:
+                    self.post_text(segment['text'].strip())
+            
+            self.progress.emit(min(100, int((batch_start + len(batch_offsets)) / len(offsets) * 100)))
+        
+        return segments
+    
+    @staticmethod
+    def _tokens_to_segments(tokens, tokenizer, window_start, window_end, time_precision):
+        """Split decoded tokens into segments at whisper's <|t|> timestamp tokens"""
+        segments = []
+        segment_start = None
+        text_tokens = []
+        for token in tokens:
+            if token >= tokenizer.timestamp_begin:
+                timestamp = window_start + (token - tokenizer.timestamp_begin) * time_precision
+                if text_tokens:
+                    segments.append({
+                        'start': segment_start if segment_start is not None else window_start,
+                        'end': timestamp,
+                        'text': tokenizer.decode(text_tokens),
+                    })
+                    text_tokens = []
+                    segment_start = None
+                else:
+                    segment_start = timestamp
+            elif token < tokenizer.eot:
+                text_tokens.append(token)
+        
+        # Text after the last timestamp runs to the end of the window
+        if text_tokens:
+            segments.append({
+                'start': segment_start if segment_start is not None else window_start,
+                'end': window_end,
+                'text': tokenizer.decode(text_tokens),
+            })
+        return segments
+    
+    def _process_segment(self, segment_data, prediction):
+        """Turn one segment's classifier output into a highlight if it qualifies"""
         timestamp, text = segment_data
         try:
-            # Pre-compute multiple classifications at once
-            prediction = classifier(text)
-            
-            # Get top emotions and scores
-            top_label = prediction[0][0]['label']
-            top_score = prediction[0][0]['score']
+            # With top_k the pipeline returns the top emotion for each text as a one-item list
+            if isinstance(prediction, list):
+                prediction = prediction[0]
             
-            # Get second highest emotion for context
-            second_label = prediction[0][1]['label'] if len(prediction[0]) > 1 else None
-            second_score = prediction[0][1]['score'] if len(prediction[0]) > 1 else 0
+            # Get top emotion and score
+            top_label = prediction['label']
+            top_score = prediction['score']
             
             # Check if top emotion meets threshold
             if top_label in HIGHLIGHT_EMOTIONS and top_score > HIGHLIGHT_EMOTIONS[top_label]:
                 # Create highlight with adjusted timestamps based on emotion type
-                if top_label in ["surprise", "fear"]:
-                    # For surprise or fear, include more lead-up time
-                    lead_time, follow_time = HIGHLIGHT_TIMING.get(top_label, HIGHLIGHT_TIMING["default"])
-                else:
-                    # Default timing for other emotions
-                    lead_time, follow_time = HIGHLIGHT_TIMING.get(top_label, HIGHLIGHT_TIMING["default"])
-                    
+                # (e.g. more lead-up time for surprise or fear, default timing otherwise)
+                lead_time, follow_time = HIGHLIGHT_TIMING.get(top_label, HIGHLIGHT_TIMING["default"])
+                
                 clip_start = max(0, timestamp + lead_time)  # lead_time is negative
                 clip_end = timestamp + follow_time
                 
@@ -274,143 +556,59 @@ class TranscriptionWorker(QThread):
         # If we don't have enough individual highlights, return an empty list
         # (being more selective overall)
         if len(individual_highlights) < HIGHLIGHT_MIN_SPIKES:
-            self.live_update.emit(f"Not enough high-confidence emotional moments found. Need at least {HIGHLIGHT_MIN_SPIKES}.")
+            self.post_text(f"Not enough high-confidence emotional moments found. Need at least {HIGHLIGHT_MIN_SPIKES}.")
             return []  # Return empty list, not None
             
-        # Sort highlights by start time
-        sorted_highlights = sorted(individual_highlights, key=lambda x: x[0])
+        # Split the highlight tuples into column arrays once; everything after works on columns
+        starts, ends, texts, labels = zip(*individual_highlights)
+        starts = np.array(starts, dtype=np.float64)
+        ends = np.array(ends, dtype=np.float64)
+        emotion_names = _EMOTION_NAMES
+        emotion_ids = np.fromiter((_EMOTION_IDS[label] for label in labels), dtype=np.int64, count=len(labels))
         
-        # List to store our multi-spike clips
-        multi_spike_clips = []
+        # Sort every column by start time (stable, so equal starts keep their detection order)
+        order = np.argsort(starts, kind='stable')
+        starts, ends, emotion_ids = starts[order], ends[order], emotion_ids[order]
+        texts = [texts[k] for k in order]
         
-        # Track segments we've already processed to avoid duplicates
-        processed_segments = set()
+        # Find the qualifying, non-overlapping windows in one compiled pass
+        windows = _scan_spike_windows(
+            starts, ends, emotion_ids, len(emotion_names), float(HIGHLIGHT_WINDOW_SECONDS),
+            HIGHLIGHT_MIN_SPIKES, HIGHLIGHT_REQUIRED_EMOTION_VARIETY,
+            float(HIGHLIGHT_MIN_CLIP_LENGTH), float(HIGHLIGHT_MAX_CLIP_LENGTH), 0.4
+        )
         
-        # Analyze windows to find high-quality emotional segments
-        for i in range(len(sorted_highlights) - HIGHLIGHT_MIN_SPIKES + 1):
-            # Skip if we've already processed this segment as part of another highlight
-            if i in processed_segments:
-                continue
-                
-            start_highlight = sorted_highlights[i]
-            start_time = start_highlight[0]
-            end_window = start_time + HIGHLIGHT_WINDOW_SECONDS
-            
-            # Find all highlights that fall within our window
-            window_highlights = [h for h in sorted_highlights 
-                              if h[0] >= start_time and h[0] <= end_window]
-            
-            # Skip if we don't have enough spikes in this window
-            if len(window_highlights) < HIGHLIGHT_MIN_SPIKES:
-                continue
-                
-            # Check for emotion variety - we want a mix of emotions
-            unique_emotions = set(h[3] for h in window_highlights)
-            if len(unique_emotions) < HIGHLIGHT_REQUIRED_EMOTION_VARIETY:
-                continue
-                
-            # Check for emotional intensity - look for significant changes
-            has_intensity = False
-            for j in range(1, len(window_highlights)):
-                # Compare consecutive highlight emotions
-                prev_highlight = window_highlights[j-1]
-                curr_highlight = window_highlights[j]
-                
-                # If different emotions, consider it intense
-                if prev_highlight[3] != curr_highlight[3]:
-                    has_intensity = True
-                    break
-            
-            if not has_intensity:
-                continue
-                
-            # Create a clip that spans from the first highlight to the end of the last
-            latest_highlight = max(window_highlights, key=lambda h: h[1])
-            clip_start = start_time
-            
-            # Enforce maximum clip length
-            raw_end = latest_highlight[1]
-            clip_end = min(raw_end, start_time + HIGHLIGHT_MAX_CLIP_LENGTH)
-            
-            # Ensure minimum length
-            clip_end = max(clip_end, clip_start + HIGHLIGHT_MIN_CLIP_LENGTH)
-            
-            # Combine text for the top 3 most significant highlights
-            sorted_by_significance = sorted(window_highlights, key=lambda h: h[3], reverse=True)
-            top_highlights = sorted_by_significance[:3]
-            combined_text = " → ".join(h[2] for h in top_highlights)
+        # List to store our multi-spike clips
+        multi_spike_clips = []
+        for lo, hi, clip_start, clip_end in windows.tolist():
+            lo, hi = int(lo), int(hi)
+            window_emotions = emotion_ids[lo:hi]
+            emotion_counts = np.bincount(window_emotions, minlength=len(emotion_names))
             
-            # Create a better label showing emotion variety
-            emotion_counts = {}
-            for h in window_highlights:
-                emotion = h[3]
-                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+            # Combine text for the top 3 most significant highlights (stable, so ties keep time order)
+            top_highlights = lo + np.argsort(-window_emotions, kind='stable')[:3]
+            combined_text = " → ".join(texts[k] for k in top_highlights)
             
-            # Format the emotion summary
-            emotion_summary = "+".join(f"{count}{emotion[:3].upper()}" for emotion, count in emotion_counts.items())
+            # Create a better label showing emotion variety, in the order emotions first appear
+            seen_ids, first_seen = np.unique(window_emotions, return_index=True)
+            emotion_summary = "+".join(
+                f"{emotion_counts[e]}{emotion_names[e][:3].upper()}" for e in seen_ids[np.argsort(first_seen)]
+            )
             
             # Create a multi-spike highlight with better labeling
-            multi_spike = (
+            multi_spike_clips.append((
                 clip_start, 
                 clip_end,
                 f"[{emotion_summary}] {combined_text}", 
                 "multi-emotion"
-            )
-            
-            # Add to our list if it doesn't overlap too much with existing clips
-            if not self._has_major_overlap(multi_spike, multi_spike_clips, overlap_threshold=0.4):
-                multi_spike_clips.append(multi_spike)
-                self.live_update.emit(f"High-quality highlight found with {len(window_highlights)} peaks and {len(unique_emotions)} different emotions!")
-                
-                # Mark all indices in this window as processed to avoid duplicates
-                for j, h in enumerate(sorted_highlights):
-                    if h[0] >= start_time and h[0] <= end_window:
-                        processed_segments.add(j)
+            ))
+            self.post_text(f"High-quality highlight found with {hi - lo} peaks and {len(seen_ids)} different emotions!")
         
         # If we found high-quality clips, return those
         if multi_spike_clips:
-            self.live_update.emit(f"Found {len(multi_spike_clips)} high-quality highlights meeting strict criteria.")
+            self.post_text(f"Found {len(multi_spike_clips)} high-quality highlights meeting strict criteria.")
             return multi_spike_clips
         
         # Otherwise return empty list - being more selective!
-        self.live_update.emit("No segments met the strict highlight criteria.")
+        self.post_text("No segments met the strict highlight criteria.")
         return []  # Return empty list, not None
-    
-    def _has_major_overlap(self, new_clip, existing_clips, overlap_threshold=0.4):
-        """Check if new_clip overlaps substantially with any existing clip"""
-        new_start, new_end = new_clip[0], new_clip[1]
-        new_duration = new_end - new_start
-        
-        for clip in existing_clips:
-            existing_start, existing_end = clip[0], clip[1]
-            
-            # Find overlap
-            overlap_start = max(new_start, existing_start)
-            overlap_end = min(new_end, existing_end)
-            
-            if overlap_end > overlap_start:  # There is an overlap
-                overlap_duration = overlap_end - overlap_start
-                
-                # If overlap is more than threshold of either clip's duration
-                if (overlap_duration / new_duration > overlap_threshold or
-                    overlap_duration / (existing_end - existing_start) > overlap_threshold):
-                    return True
-                    
-        return False
-
-    @staticmethod
-    def optimize_classifier_for_batching(classifier):
-        """
-        Modify the classifier to accept batches of text
-        This is a placeholder - implementation depends on your classifier type
-        """
-        try:
-            return pipeline(
-                "text-classification", 
-                model=classifier.model,
-                tokenizer=classifier.tokenizer,
-                batch_size=8,
-                truncation=True
-            )
-        except:
-            return classifier  # Default: return original classifier
\ No newline at end of file
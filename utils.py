@@ -4,24 +4,47 @@ import os
 import sys
 import gc
 import time
+import math
+from functools import lru_cache
 from config import PSUTIL_AVAILABLE
 
+if PSUTIL_AVAILABLE:
+    import psutil
+    # Prime psutil's CPU sample so later non-blocking cpu_percent() calls measure load since import
+    psutil.cpu_percent(interval=None)
+
+# glibc's malloc_trim returns freed heap pages to the OS. Look it up once; musl and non-Linux
+# libcs don't have it, so memory cleanup just skips the trim there
+_malloc_trim = None
+if 'linux' in sys.platform:
+    try:
+        import ctypes
+        _malloc_trim = ctypes.CDLL('libc.so.6').malloc_trim
+    except (OSError, AttributeError):
+        pass
+
 def format_time(seconds):
     """Format time in seconds to HH:MM:SS format"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = int(seconds % 60)
+    # Only whole seconds are shown, so every position within the same second shares one cache entry
+    return _format_whole_seconds(math.floor(seconds))
+
+@lru_cache(maxsize=4096)
+def _format_whole_seconds(seconds):
+    """Format an integer number of seconds as HH:MM:SS"""
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    seconds = seconds % 60
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 def parse_time_string(time_str):
     """Parse a time string in HH:MM:SS format to seconds"""
+    # One split and direct arithmetic on the parts; int() raises ValueError for bad input
     parts = time_str.split(':')
-    if len(parts) == 3:
-        hours, minutes, seconds = map(int, parts)
-        return hours * 3600 + minutes * 60 + seconds
-    elif len(parts) == 2:
-        minutes, seconds = map(int, parts)
-        return minutes * 60 + seconds
+    n = len(parts)
+    if n == 3:
+        return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+    elif n == 2:
+        return int(parts[0]) * 60 + int(parts[1])
     else:
         try:
             return int(time_str)
@@ -33,19 +56,13 @@ def optimize_memory():
     # Force full garbage collection
     gc.collect(2)
     
-    # If on Linux, try to release memory back to OS
-    if 'linux' in sys.platform:
-        try:
-            import ctypes
-            libc = ctypes.CDLL('libc.so.6')
-            libc.malloc_trim(0)
-        except:
-            pass
+    # If on glibc, release freed memory back to OS
+    if _malloc_trim is not None:
+        _malloc_trim(0)
     
     # If psutil is available, check memory usage
     if PSUTIL_AVAILABLE:
         try:
-            import psutil
             process = psutil.Process()
             memory_info = process.memory_info()
             memory_mb = memory_info.rss / (1024 * 1024)
@@ -55,6 +72,36 @@ def optimize_memory():
     
     return "Memory optimized"
 
+def cuda_supports_fp16():
+    """Check for a CUDA GPU with fast FP16 support (compute capability 7.0 / Volta or newer)"""
+    try:
+        import torch
+        return torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 7
+    except Exception:
+        return False
+
+def whisper_inference_context(device_type, fp16):
+    """Context for openai-whisper inference: no autograd, plus fp16 autocast on CUDA.
+    
+    Autocast keeps whisper's LayerNorm (which upcasts its input) working with half precision weights
+    """
+    import contextlib
+    import torch
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if device_type == "cuda" and fp16:
+        stack.enter_context(torch.autocast("cuda", dtype=torch.float16))
+    return stack
+
+def is_faster_whisper_model(model):
+    """Check if a loaded speech model is a faster-whisper WhisperModel rather than an openai-whisper one"""
+    return type(model).__module__.startswith("faster_whisper")
+
+@lru_cache(maxsize=1)
+def _cpu_counts():
+    """Return (physical cores, logical threads); hardware counts don't change while running"""
+    return psutil.cpu_count(logical=False) or 2, psutil.cpu_count(logical=True) or 4
+
 def get_resource_limits(task_type="emotion"):
     """
     Determine resource limits based on system capabilities and current load
@@ -69,12 +116,11 @@ def get_resource_limits(task_type="emotion"):
     # Try to use psutil for adaptive resource management if available
     if PSUTIL_AVAILABLE:
         try:
-            import psutil
             # Get system specs
-            cpu_cores = psutil.cpu_count(logical=False) or 2
-            cpu_threads = psutil.cpu_count(logical=True) or 4
+            cpu_cores, cpu_threads = _cpu_counts()
             mem_available_gb = psutil.virtual_memory().available / (1024 * 1024 * 1024)
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            # Load since the previous call (or import); interval=None returns at once instead of sleeping 100 ms
+            cpu_percent = psutil.cpu_percent(interval=None)
             
             # Current system load factor (0.0-1.0)
             # Higher means system is more loaded, should be more conservative